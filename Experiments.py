@@ -3,23 +3,261 @@ This module contains the code used to actually run experiments and to parse
 the results of those experiments.
 '''
 import os
+import json
+import struct
+import hashlib
 import random
+import multiprocessing
 import HillClimber
-from Individual import Individual
+from Individual import Individual, PopulationMatrix
 from LTGA import LTGA
 import FitnessFunction
 import Util
 import gzip
+import numpy
+try:
+    import fcntl
+except ImportError:
+    # File locking is only available on Unix
+    fcntl = None
+
+# Configuration values which do not change the outcome of a bisection run.
+# Whether ``jobs`` is set does, as it decides how runs are seeded, so
+# ``outcomeConfiguration`` records that instead of the number of processes
+BISECTION_INDEPENDENT = ["popSize", "verbose", "runs", "jobs",
+                         "bisectionRuns", "bisectionFailureLimit",
+                         "bisectionSizes", "bisectionFolder",
+                         "initialPopFolder", "nkProblemFolder", "batch",
+                         "populationMatrix"]
+
+# Changed whenever run outcomes saved by earlier versions may no longer hold
+BISECTION_CACHE_VERSION = 1
+
+# Identifies packed initial population files and the version of their layout
+POPULATION_MAGIC = 'LTGAPOP1'
+# Packed initial populations start with the magic, dimensions and the number
+# of subproblems
+POPULATION_HEADER = struct.Struct('<8sII')
+
+# Fitness functions and decoded initial population files created by this
+# process, reused by later runs
+evaluatorCache = Util.LRUCache(128)
+populationCache = Util.LRUCache(32)
+
+
+def createEvaluator(config, runNumber):
+    '''
+    Returns the ``FitnessFunction`` for the configured problem and run
+    number.  Fitness functions are reused if this process has already
+    created one for the same problem, configuration and run number, which
+    avoids reloading NK landscapes from disk.
+
+    Parameters:
+
+    - ``config``: A dictionary containing the ``problem`` and all
+      configuration information required to initialize the
+      ``FitnessFunction``.
+    - ``runNumber``: What number run the fitness function is for.
+    '''
+    # Population size never changes the fitness function
+    settings = {key: value for key, value in config.items()
+                if key != "popSize"}
+    key = (config["problem"], json.dumps(settings, sort_keys=True),
+           runNumber)
+    try:
+        return evaluatorCache[key]
+    except KeyError:
+        options = Util.moduleClasses(FitnessFunction)
+        evaluator = options[config["problem"]](config, runNumber)
+        evaluatorCache[key] = evaluator
+        return evaluator
+
+
+def populationRowType(dimensions, subproblems):
+    '''
+    Returns the NumPy record type of a single row in a packed initial
+    population file.  Each row stores the individual's genes packed into
+    bits, its fitness, the hill climbing iterations and evaluations used to
+    create it, and one byte per subproblem set if it is solved.
+
+    Parameters:
+
+    - ``dimensions``: The number of genes in each individual.
+    - ``subproblems``: The number of subproblems in the problem.
+    '''
+    return numpy.dtype([('genes', numpy.uint8, ((dimensions + 7) // 8,)),
+                        ('fitness', '<f8'),
+                        ('iterations', '<u4'),
+                        ('evaluations', '<u4'),
+                        ('solved', numpy.uint8, (subproblems,))])
+
+
+def readPopulation(f, count):
+    '''
+    Reads the header and up to ``count`` rows from an open packed initial
+    population file.  Returns the NumPy record type of the rows, the number
+    of complete rows in the file, and a record array of the rows read.  Rows
+    are fixed width, so only the requested rows are read.  Raises an IOError
+    if the file is not a packed initial population.
+
+    Parameters:
+
+    - ``f``: The file to read, positioned at the start.
+    - ``count``: The most rows to read.
+    '''
+    header = f.read(POPULATION_HEADER.size)
+    if len(header) < POPULATION_HEADER.size:
+        raise IOError("Incomplete initial population: " + f.name)
+    magic, dimensions, subproblems = POPULATION_HEADER.unpack(header)
+    if magic != POPULATION_MAGIC:
+        raise IOError("Not a packed initial population: " + f.name)
+    rowType = populationRowType(dimensions, subproblems)
+    f.seek(0, os.SEEK_END)
+    # An interrupted append may leave part of a row at the end
+    total = (f.tell() - POPULATION_HEADER.size) // rowType.itemsize
+    f.seek(POPULATION_HEADER.size)
+    data = f.read(min(count, total) * rowType.itemsize)
+    return rowType, total, numpy.frombuffer(data, rowType)
+
+
+def loadPopulation(filename, count):
+    '''
+    Returns a record array of up to the first ``count`` rows saved in a
+    packed initial population file.  Rows read earlier by this process are
+    reused as long as the file has not changed since.  Raises an OSError if
+    the file does not exist.
+
+    Parameters:
+
+    - ``filename``: The initial population file to load.
+    - ``count``: The most rows to return.
+    '''
+    status = os.stat(filename)
+    signature = status.st_mtime, status.st_size
+    try:
+        known, total, rows = populationCache[filename]
+        # Rows read earlier only suffice if there were enough of them, or if
+        # they were every row in the file
+        if known == signature and (count <= len(rows) or len(rows) == total):
+            return rows[:count]
+    except KeyError:
+        pass
+    with open(filename, 'rb') as f:
+        _, total, rows = readPopulation(f, count)
+    populationCache[filename] = signature, total, rows
+    return rows
+
+
+def appendPopulation(filename, start, rows):
+    '''
+    Adds rows to the end of a packed initial population file, creating it
+    if needed.  Existing rows are never rewritten.  The file is locked while
+    it is extended, and rows another process has already added are not
+    written again.
+
+    Parameters:
+
+    - ``filename``: The initial population file to extend.
+    - ``start``: The row number of the first row in ``rows``.
+    - ``rows``: A list of dictionaries, each containing the ``genes``,
+      ``fitness``, ``iterations``, ``evaluations`` and ``subproblems`` of one
+      individual.
+    '''
+    dimensions = len(rows[0]['genes'])
+    subproblems = len(rows[0]['subproblems'])
+    packed = numpy.zeros(len(rows), populationRowType(dimensions,
+                                                      subproblems))
+    packed['genes'] = numpy.packbits(numpy.array([row['genes']
+                                                  for row in rows],
+                                                 dtype=numpy.uint8), axis=1)
+    for field in ['fitness', 'iterations', 'evaluations']:
+        packed[field] = [row[field] for row in rows]
+    packed['solved'] = [row['subproblems'] for row in rows]
+    descriptor = os.open(filename, os.O_RDWR | os.O_CREAT, 0666)
+    with os.fdopen(descriptor, 'r+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            rowType, total, _ = readPopulation(f, 0)
+            if rowType != packed.dtype:
+                raise IOError("Initial population does not match: " +
+                              filename)
+        except IOError:
+            f.seek(0, os.SEEK_END)
+            if f.tell() >= POPULATION_HEADER.size:
+                raise
+            # Nothing useful has been written yet
+            f.seek(0)
+            f.write(POPULATION_HEADER.pack(POPULATION_MAGIC, dimensions,
+                                           subproblems))
+            total = 0
+        end = POPULATION_HEADER.size + total * packed.dtype.itemsize
+        f.seek(end)
+        f.truncate()
+        f.write(packed[max(0, total - start):].tostring())
+
+
+def convertPopulation(source, filename):
+    '''
+    Converts an initial population saved as a gzip JSON list by earlier
+    versions, in which each row holds running sums, into a packed initial
+    population file.  Raises an IOError if the source does not exist.
+
+    Parameters:
+
+    - ``source``: The gzip JSON initial population file.
+    - ``filename``: The packed initial population file to create.
+    '''
+    data = Util.loadConfiguration(source, gzip.open)
+    rows = []
+    previous = {'iterations': 0, 'evaluations': 0,
+                'subproblems': [0] * len(data[0]['subproblems'])}
+    for row in data:
+        rows.append({'genes': row['genes'], 'fitness': row['fitness'],
+                     'iterations': row['iterations'] - previous['iterations'],
+                     'evaluations': (row['evaluations'] -
+                                     previous['evaluations']),
+                     'subproblems': [current - prior for current, prior in
+                                     zip(row['subproblems'],
+                                         previous['subproblems'])]})
+        previous = row
+    appendPopulation(filename, 0, rows)
+
+
+def climbRows(arguments):
+    '''
+    Creates and hill climbs random individuals, each using its own stream of
+    random numbers, such that the result only depends on the seeds.  Returns
+    a list containing the genes and number of hill climbing evaluations for
+    each individual.  Takes a single tuple so it can be used by
+    ``Util.poolMap``.
+
+    Parameters:
+
+    - ``arguments``: A tuple containing the ``FitnessFunction`` used to
+      climb, the number of dimensions, and the list of seeds, one per
+      individual.
+    '''
+    evaluator, dimensions, seeds = arguments
+    climbed = []
+    for seed in seeds:
+        random.seed(seed)
+        genes = Util.randomBitString(dimensions)
+        evaluations = HillClimber.gainTableClimb(genes, evaluator)
+        climbed.append((genes, evaluations))
+    return climbed
 
 
 def createInitialPopulation(runNumber, evaluator, config):
     '''
     Used to create the initial population for a given run on a specified
-    problem.  Uses a ``HillClimber.steepestAscentHillClimber`` to optimize all
-    individuals.  Will store results to the 'initialPopFolder' specified by
-    ``config`` for future use, and will automatically load past saved
-    information.  Returns the population and a dictionary describing features
-    of that population as well as how it was created.
+    problem.  Uses ``HillClimber.gainTableClimb``, which is equivalent to
+    steepest ascent hill climbing, to optimize all individuals.  Will store
+    results to the 'initialPopFolder' specified by ``config`` for future use,
+    and will automatically load past saved information.  Populations are
+    stored in packed files which new individuals are appended to, see
+    ``appendPopulation``.  Returns the population and a dictionary
+    describing features of that population as well as how it was created.
 
     Parameters:
 
@@ -38,52 +276,127 @@ def createInitialPopulation(runNumber, evaluator, config):
       - ``dimensions``: The number of dimensions in the problem.
       - ``k``: The k value used by the problem.
       - ``popSize``: The population size to be created.
+      - ``populationMatrix``: Optional, if true the population is returned as
+        an ``Individual.PopulationMatrix`` instead of a list.
+      - ``batchClimb``: Optional, if true all new individuals are created
+        first and then climbed together using ``HillClimber.batchClimb``.
+      - ``initialPopProcesses``: Optional, if set each new individual is
+        created using its own random number stream by ``climbRows``, using
+        a pool of this many processes.  The saved population is the same
+        for any number of processes.  Ignored if ``batchClimb`` is set.
     '''
     rngState = random.getstate()  # Stores the state of the RNG
     filename = config["initialPopFolder"] + os.sep
     filename += "%(problem)s_%(dimensions)i_%(k)i_" % config
-    filename += "%i.dat.gz" % runNumber
+    filename += "%i.pop" % runNumber
     try:
-        data = Util.loadConfiguration(filename, gzip.open)
-    except IOError:
-        data = []
+        rows = loadPopulation(filename, config["popSize"])
+    except (IOError, OSError):
+        try:
+            # Converts populations saved as JSON by earlier versions
+            convertPopulation(os.path.splitext(filename)[0] + ".dat.gz",
+                              filename)
+            rows = loadPopulation(filename, config["popSize"])
+        except IOError:
+            rows = []
+    stored = len(rows)
 
     # Build new individuals if there aren't enough stored
-    newInfo = len(data) < config["popSize"]
-    while len(data) < config["popSize"]:
-        row = {}
-        genes = Util.randomBitString(config['dimensions'])
-        evaluations = HillClimber.climb(genes, evaluator,
-                                 HillClimber.steepestAscentHillClimber)
-        iterations = evaluations / config['dimensions']
-        fitness = evaluator.evaluate(genes)
-        subproblems = evaluator.subProblemsSolved(genes)
+    newInfo = stored < config["popSize"]
+    climbed = []
+    if newInfo and config.get("batchClimb", False):
+        genomes = [Util.randomBitString(config['dimensions'])
+                   for _ in xrange(config["popSize"] - stored)]
+        climbed = zip(genomes, HillClimber.batchClimb(genomes, evaluator))
+        climbed.reverse()
+    elif newInfo and "initialPopProcesses" in config:
+        # Each row's seed depends only on the current RNG and its position
+        base = random.getrandbits(64)
+        seeds = range(base + stored, base + config["popSize"])
+        processes = config["initialPopProcesses"]
+        # Uses several tasks per process to balance uneven climbs
+        size = max(1, -(-len(seeds) // (processes * 4)))
+        tasks = [(evaluator, config['dimensions'], seeds[i:i + size])
+                 for i in xrange(0, len(seeds), size)]
+        parts = Util.poolMap(climbRows, tasks, processes)
+        climbed = [row for part in parts for row in part]
+        climbed.reverse()
+    created = []
+    while stored + len(created) < config["popSize"]:
         try:
-            # Keeps a running sum of current population
-            total = data[-1]
-            iterations += total['iterations']
-            evaluations += total['evaluations']
-            subproblems = [prev + curr for (prev, curr) in
-                           zip(total['subproblems'], subproblems)]
+            # Uses the next individual climbed together with the others
+            genes, evaluations = climbed.pop()
         except IndexError:
-            # No need to sum if no previous individuals
-            pass
-        minSubProblem = min(subproblems)
-        row = {'iterations': iterations, 'evaluations': evaluations,
-               'minSubProblem': minSubProblem, 'fitness': fitness,
-               'genes': genes, 'subproblems': subproblems}
-        data.append(row)
+            genes = Util.randomBitString(config['dimensions'])
+            evaluations = HillClimber.gainTableClimb(genes, evaluator)
+        created.append({'genes': genes, 'fitness': evaluator.evaluate(genes),
+                        'iterations': evaluations / config['dimensions'],
+                        'evaluations': evaluations,
+                        'subproblems': evaluator.subProblemsSolved(genes)})
     if newInfo:
-        Util.saveList(filename, data, gzip.open)
-    # Trim extra information
-    data = data[:config["popSize"]]
-    population = [Individual(row["genes"], row["fitness"]) for row in data]
-    # Get the last row's information about the population
-    total = data[-1]
+        appendPopulation(filename, stored, created)
+        # Uses the saved rows in case another process added rows first
+        rows = loadPopulation(filename, config["popSize"])
+    genes = numpy.unpackbits(rows['genes'], axis=1)[:, :config['dimensions']]
+    if config.get("populationMatrix", False):
+        population = PopulationMatrix()
+    else:
+        population = []
+    for individual, fitness in zip(genes.tolist(), rows['fitness'].tolist()):
+        population.append(Individual(individual, fitness))
+    # Sums the information about each individual in the population
+    subproblems = rows['solved'].sum(axis=0, dtype=numpy.int64)
     random.setstate(rngState)  # Ensures RNG isn't modified by this function
-    return  population, {"LS_iterations": total["iterations"],
-                         "LS_evaluations": total["evaluations"],
-                         "minSubProblem": total['minSubProblem']}
+    return  population, {"LS_iterations": int(rows['iterations'].sum()),
+                         "LS_evaluations": int(rows['evaluations'].sum()),
+                         "minSubProblem": int(subproblems.min())}
+
+
+def evaluateBatch(individuals, evaluator, lookup, result, config):
+    '''
+    Used by ``oneRun`` to find the fitness of a list of individuals sent out
+    together by the optimizer.  Individuals found in ``lookup`` are not
+    evaluated, and if only unique evaluations are counted each distinct set of
+    genes in the batch is evaluated once.  Returns the list of fitness values,
+    where individuals that could not be evaluated before reaching the
+    evaluation limit have a fitness of None.
+
+    Parameters:
+
+    - ``individuals``: The list of individuals to find the fitness of.
+    - ``evaluator``: The ``FitnessFunction`` used to evaluate individuals,
+      all of which are passed to its ``evaluateBatch`` together.
+    - ``lookup``: A dictionary mapping the integer form of previously
+      evaluated individuals to their fitness.
+    - ``result``: The result dictionary of the current run, whose
+      ``evaluations`` count is increased for each evaluation performed.
+    - ``config``: A dictionary containing the ``maximumEvaluations`` and
+      ``unique`` configuration values.
+    '''
+    keys = [int(individual) for individual in individuals]
+    fitness = [lookup.get(key) for key in keys]
+    # Finds which individuals actually need to be evaluated
+    pending, seen = [], set()
+    for position, key in enumerate(keys):
+        if fitness[position] is None:
+            if config['unique']:
+                if key in seen:
+                    continue
+                seen.add(key)
+            pending.append(position)
+    remaining = config["maximumEvaluations"] - result['evaluations']
+    pending = pending[:remaining]
+    values = evaluator.evaluateBatch([individuals[position].genes
+                                      for position in pending])
+    for position, value in zip(pending, values):
+        fitness[position] = value
+        if config['unique']:
+            lookup[keys[position]] = value
+        result['evaluations'] += 1
+    if config['unique']:
+        # Fills in duplicates of individuals evaluated in this batch
+        fitness = [lookup.get(key) for key in keys]
+    return fitness
 
 
 def oneRun(runNumber, optimizerClass, evaluator, config):
@@ -107,6 +420,10 @@ def oneRun(runNumber, optimizerClass, evaluator, config):
         success.
       - ``unique``: A True / False value to determine if only unique
         evaluations should be counted
+      - ``batch``: Optional, if true the optimizer sends out lists of
+        individuals which are evaluated using ``evaluateBatch``.
+      - ``delta``: Optional, if true the optimizer reports which genes
+        changed, allowing ``evaluator.evaluateDelta`` to be used.
       - All configuration information required by ``createInitialPopulation``
         and any required by the ``optimizerClass``.
     '''
@@ -116,27 +433,52 @@ def oneRun(runNumber, optimizerClass, evaluator, config):
     bestFitness = max(population).fitness
     lookup = {int(individual): individual.fitness
               for individual in population}
-    optimizer = optimizerClass().generate(population, config)
+    optimizer = optimizerClass()
+    generator = optimizer.generate(population, config)
+    batch = config.get("batch", False)
+    # Evaluators which are not a FitnessFunction may only provide evaluate
+    delta = getattr(evaluator, 'evaluateDelta', None)
     try:
-        individual = optimizer.next()  # Get the first individual
+        # Get the first individual, or list of individuals if batching
+        sent = generator.next()
         while (result['evaluations'] < config["maximumEvaluations"] and
                bestFitness < config["maximumFitness"]):
-            key = int(individual)
-            try:
-                # If this individual has been rated before
-                fitness = lookup[key]
-            except KeyError:
-                # Evaluate the individual
-                fitness = evaluator.evaluate(individual.genes)
-                if config['unique']:
-                    lookup[key] = fitness
-                result['evaluations'] += 1
-            if bestFitness < fitness:
-                bestFitness = fitness
+            if batch:
+                fitness = evaluateBatch(sent, evaluator, lookup, result,
+                                        config)
+                known = [value for value in fitness if value is not None]
+                bestFitness = max([bestFitness] + known)
+                # Evaluation limit was reached part way through the batch
+                if len(known) < len(fitness):
+                    break
+            else:
+                # Optimizers may report what changed from a known individual
+                if isinstance(sent, tuple):
+                    individual, changed, previousFitness = sent
+                else:
+                    individual, changed = sent, None
+                key = int(individual)
+                try:
+                    # If this individual has been rated before
+                    fitness = lookup[key]
+                except KeyError:
+                    # Evaluate the individual
+                    if changed is None or delta is None:
+                        fitness = evaluator.evaluate(individual.genes)
+                    else:
+                        fitness = delta(individual.genes, changed,
+                                        previousFitness, key)
+                    if config['unique']:
+                        lookup[key] = fitness
+                    result['evaluations'] += 1
+                if bestFitness < fitness:
+                    bestFitness = fitness
             # Send the fitness into the optimizer and get the next individual
-            individual = optimizer.send(fitness)
+            sent = generator.send(fitness)
     except StopIteration:  # If the optimizer ever stops, just end the run
         pass
+    # Only optimizers using two parent crossover skip masks
+    result['skippedMasks'] = sum(getattr(optimizer, 'skippedMasks', []))
 
     result['success'] = int(bestFitness >= config["maximumFitness"])
     if config['verbose']:
@@ -144,6 +486,46 @@ def oneRun(runNumber, optimizerClass, evaluator, config):
     return result
 
 
+def seedRun(config, runNumber):
+    '''
+    Seeds the random number generator using only the configured seed and the
+    run number, such that a run does not depend on any other runs.  Returns
+    a copy of the configuration which creates initial populations using
+    ``climbRows``.
+
+    Parameters:
+
+    - ``config``: A dictionary containing the ``seed`` configuration value.
+    - ``runNumber``: What number run is being seeded.
+    '''
+    random.seed((config['seed'] << 32) + runNumber)
+    config = dict(config)
+    # Rows seeded by position never repeat rows already saved for this run
+    config.setdefault("initialPopProcesses", 1)
+    if multiprocessing.current_process().daemon:
+        # Pool workers cannot start their own pools
+        config["initialPopProcesses"] = 1
+    return config
+
+
+def seededRun(arguments):
+    '''
+    Performs a single run of LTGA seeded by ``seedRun``, such that the result
+    does not depend on any other runs.  Takes a single tuple so it can be
+    used by ``Util.poolMap``.
+
+    Parameters:
+
+    - ``arguments``: A tuple containing the configuration dictionary and the
+      run number.  The configuration must include ``seed`` and all values
+      required by ``fullRun``.
+    '''
+    config, runNumber = arguments
+    config = seedRun(config, runNumber)
+    evaluator = createEvaluator(config, runNumber)
+    return oneRun(runNumber, LTGA, evaluator, config)
+
+
 def fullRun(config):
     '''
     Performs a full run of the specified configuration using ``oneRun``. Will
@@ -158,21 +540,92 @@ def fullRun(config):
       - ``runs``: The number of runs to perform
       - ``problem``: The problem being solved, for instance ``DeceptiveTrap``,
         ``DeceptiveStepTrap`` or ``NearestNeighborNK``.
+      - ``jobs``: Optional, if set each run is seeded using ``seed`` and its
+        run number by ``seededRun``, and runs are distributed across a pool
+        of this many processes.  Results are the same for any number of
+        processes.  New initial population rows are then always created by
+        ``climbRows``, seeding each row by its position in the saved
+        population, so extending a saved population never repeats its
+        existing rows.  Without ``jobs`` rows are created as before unless
+        ``initialPopProcesses`` is set.
       - All configuration information required to initialize the
         ``FitnessFunction.``
       - All configuration information required by ``oneRun``.
     '''
     results = []
     try:
-        for runNumber in range(config["runs"]):
-            options = Util.moduleClasses(FitnessFunction)
-            evaluator = options[config["problem"]](config, runNumber)
-            results.append(oneRun(runNumber, LTGA, evaluator, config))
+        if "jobs" not in config:
+            for runNumber in range(config["runs"]):
+                evaluator = createEvaluator(config, runNumber)
+                results.append(oneRun(runNumber, LTGA, evaluator, config))
+        else:
+            tasks = [(config, runNumber)
+                     for runNumber in range(config["runs"])]
+            for result in Util.poolMap(seededRun, tasks, config["jobs"]):
+                results.append(result)
     except KeyboardInterrupt:
         print "Caught interrupt, exiting"
     return results
 
 
+def pregenerateRun(arguments):
+    '''
+    Creates and saves the fitness function and initial population required
+    by a single run, unless they have already been saved.  The run is seeded
+    by ``seedRun``, so the saved population is the same one ``seededRun``
+    would have created.  Returns the run number.  Takes a single tuple so it
+    can be used by ``Util.poolMap``.
+
+    Parameters:
+
+    - ``arguments``: A tuple containing the configuration dictionary and the
+      run number.  The configuration must include ``seed`` and all values
+      required by ``createInitialPopulation``.
+    '''
+    config, runNumber = arguments
+    config = seedRun(config, runNumber)
+    evaluator = createEvaluator(config, runNumber)
+    createInitialPopulation(runNumber, evaluator, config)
+    return runNumber
+
+
+def pregenerate(config, runNumbers):
+    '''
+    Creates all NK instances and initial populations needed by the given runs
+    using ``pregenerateRun``, such that later experiments using at most the
+    configured population size only read saved files.  Files are written
+    atomically and locked while being created, so several processes can
+    pregenerate at once.  Returns the list of run numbers that were
+    completed, which is partial if a keyboard interrupt occurs.
+
+    Parameters:
+
+    - ``config``: A dictionary containing all configuration information
+      required by ``pregenerateRun``.  Should include values for:
+
+      - ``popSize``: The largest population size that will be used.
+      - ``jobs``: Optional, the number of processes to use.  If there are
+        fewer runs than processes, each initial population is instead
+        climbed using this many processes.
+    - ``runNumbers``: The list of run numbers to create files for.
+    '''
+    jobs = config.get("jobs", 1)
+    if len(runNumbers) < jobs:
+        config = dict(config, initialPopProcesses=jobs)
+        jobs = 1
+    tasks = [(config, runNumber) for runNumber in runNumbers]
+    completed = []
+    try:
+        for runNumber in Util.poolMap(pregenerateRun, tasks, jobs,
+                                      ordered=False):
+            completed.append(runNumber)
+            if config['verbose']:
+                print 'Created files for run', runNumber
+    except KeyboardInterrupt:
+        print "Caught interrupt, exiting"
+    return completed
+
+
 def combineResults(results):
     '''
     Given a list of result dictionaries, determine the mean and standard
@@ -207,6 +660,191 @@ def combineResults(results):
     return combined
 
 
+def outcomeConfiguration(config):
+    '''
+    Returns a dictionary of every configuration value which can change the
+    outcome of a bisection run, which excludes those listed in
+    ``BISECTION_INDEPENDENT``.  Also includes whether runs are seeded by
+    ``seededRun``, which happens when ``jobs`` is set, and
+    ``BISECTION_CACHE_VERSION``, so outcomes saved by incompatible versions
+    are never reused.
+
+    Parameters:
+
+    - ``config``: A dictionary containing all configuration information
+      required by ``bisection``.
+    '''
+    relevant = {key: value for key, value in config.items()
+                if key not in BISECTION_INDEPENDENT}
+    relevant["seededRuns"] = "jobs" in config
+    relevant["bisectionCacheVersion"] = BISECTION_CACHE_VERSION
+    return relevant
+
+
+def bisectionCacheFile(config):
+    '''
+    Returns the name of the file used to store bisection run outcomes for
+    this configuration, or None if no ``bisectionFolder`` is configured.  The
+    name is a hash of the configuration given by ``outcomeConfiguration``,
+    so any configuration change that could alter run outcomes uses a
+    different file.
+
+    Parameters:
+
+    - ``config``: A dictionary containing all configuration information
+      required by ``bisection``.
+    '''
+    try:
+        folder = config["bisectionFolder"]
+    except KeyError:
+        return None
+    relevant = outcomeConfiguration(config)
+    key = hashlib.sha1(json.dumps(relevant, sort_keys=True)).hexdigest()
+    return folder + os.sep + key + ".json"
+
+
+def loadOutcomes(filename):
+    '''
+    Returns the run outcomes stored in a bisection cache file as a dictionary
+    mapping population sizes to dictionaries, each mapping run numbers to
+    the success of that run.  Returns an empty dictionary if the file does
+    not exist.
+
+    Parameters:
+
+    - ``filename``: The bisection cache file, as given by
+      ``bisectionCacheFile``.
+    '''
+    try:
+        stored = Util.loadConfiguration(filename)["outcomes"]
+    except IOError:
+        return {}
+    # JSON stores all keys as strings
+    return {int(size): {int(runNumber): success
+                        for runNumber, success in runs.iteritems()}
+            for size, runs in stored.iteritems()}
+
+
+def saveOutcomes(filename, config, outcomes):
+    '''
+    Adds run outcomes to a bisection cache file, keeping any outcomes other
+    processes have saved since the file was loaded.  The file is replaced in
+    one step so readers never see partial data, and a ``.lock`` file next to
+    it is locked while it is merged so no other process's outcomes are lost.
+
+    Parameters:
+
+    - ``filename``: The bisection cache file, as given by
+      ``bisectionCacheFile``.
+    - ``config``: The configuration the outcomes are for, stored alongside
+      them for reference.
+    - ``outcomes``: A dictionary of run outcomes, as returned by
+      ``loadOutcomes``.
+    '''
+    with open(filename + ".lock", 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        combined = loadOutcomes(filename)
+        for size, runs in outcomes.iteritems():
+            combined.setdefault(size, {}).update(runs)
+        temporary = filename + ".%i.tmp" % os.getpid()
+        Util.saveConfiguration(temporary,
+                               {"config": outcomeConfiguration(config),
+                                "outcomes": combined})
+        os.rename(temporary, filename)
+
+
+def knownSuccess(config, runs):
+    '''
+    Returns True if the known outcomes for a population size show it can
+    succeed, False if they show it cannot, and None if more runs are needed.
+
+    Parameters:
+
+    - ``config``: A dictionary containing the ``bisectionRuns`` and
+      ``bisectionFailureLimit`` configuration values.
+    - ``runs``: A dictionary mapping run numbers to the success of that run.
+    '''
+    used = [success for runNumber, success in runs.iteritems()
+            if runNumber < config["bisectionRuns"]]
+    if used.count(0) > config['bisectionFailureLimit']:
+        return False
+    if len(used) == config["bisectionRuns"]:
+        return True
+    return None
+
+
+def smallestSuccessful(config, sizes, outcomes):
+    '''
+    Returns the smallest of the given population sizes which can solve the
+    configured problem, or None if none of them can.  Runs are performed by
+    ``seededRun`` on a pool of processes, so the result does not depend on
+    the number of processes.  Runs are started in order of population size
+    and then run number.  Runs for a population size stop being started as
+    soon as it exceeds the failure limit, or once a smaller population size
+    is known to succeed.  Outstanding runs are cancelled as soon as the
+    answer is known.  Runs sharing a run number are never performed at the
+    same time, as they share an initial population file.
+
+    Parameters:
+
+    - ``config``: A dictionary containing all configuration information
+      required by ``bisection``, including ``jobs`` and ``seed``.
+    - ``sizes``: The list of population sizes to try, in increasing order.
+    - ``outcomes``: A dictionary mapping population sizes to dictionaries of
+      known run outcomes, as returned by ``loadOutcomes``.  Known runs are
+      not performed again, and new outcomes are added.
+    '''
+    for size in sizes:
+        outcomes.setdefault(size, {})
+    pending = [(size, runNumber) for size in sizes
+               for runNumber in xrange(config["bisectionRuns"])
+               if runNumber not in outcomes[size]]
+    running = []
+    pool = None
+    try:
+        while True:
+            decided = dict((size, knownSuccess(config, outcomes[size]))
+                           for size in sizes)
+            # The answer is known once every smaller size has failed
+            for size in sizes:
+                if decided[size]:
+                    return size
+                if decided[size] is None:
+                    break
+            else:
+                return None
+            # Runs which can no longer change the answer are never started
+            pending = [(size, runNumber) for size, runNumber in pending
+                       if decided[size] is None and
+                       not any(decided[other] for other in sizes
+                               if other < size)]
+            for task in list(pending):
+                if len(running) >= config["jobs"]:
+                    break
+                size, runNumber = task
+                if any(runNumber == other for _, other, _ in running):
+                    continue
+                if pool is None:
+                    pool = Util.createPool(config["jobs"])
+                pending.remove(task)
+                trialConfig = dict(config)
+                trialConfig['popSize'] = size
+                result = pool.apply_async(seededRun,
+                                          [(trialConfig, runNumber)])
+                running.append((size, runNumber, result))
+            # Waits a short time for the oldest run to finish
+            running[0][2].wait(0.01)
+            for task in [task for task in running if task[2].ready()]:
+                running.remove(task)
+                size, runNumber, result = task
+                outcomes[size][runNumber] = result.get()['success']
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
 def bisection(config):
     '''
     Determines the minimum population size for a configuration that acceptably
@@ -230,39 +868,88 @@ def bisection(config):
         size can fail to find the global optimum of a problem before it is
         marked as unsuccessful.  IE: A failure limit of 1 means it can fail one
         of the ``bisectionRuns`` without being marked as unsuccessful.
+      - ``jobs``: Optional, if set runs are performed in parallel using
+        ``smallestSuccessful``.
+      - ``bisectionSizes``: Optional, how many doubled population sizes
+        ``smallestSuccessful`` should try at once.  Defaults to 1.
+      - ``bisectionFolder``: Optional, the relative path to the folder where
+        run outcomes are saved and reused by future bisections of the same
+        configuration.  Known outcomes set the initial search bounds, and
+        only runs without a known outcome are performed.  Not set by
+        default, include ``experiments/bisectionCache.cfg`` to use it.
       - All configuration information required to initialize the
         ``FitnessFunction.``
       - All configuration information required by ``oneRun``.
     '''
+    filename = bisectionCacheFile(config)
+    if filename is None:
+        outcomes = {}
+    else:
+        outcomes = loadOutcomes(filename)
+
     def canSucceed(config):
+        known = outcomes.setdefault(config['popSize'], {})
         failures = 0
         for runNumber in xrange(config["bisectionRuns"]):
-            options = Util.moduleClasses(FitnessFunction)
-            evaluator = options[config["problem"]](config, runNumber)
-            result = oneRun(runNumber, LTGA, evaluator, config)
-            if not result['success']:
+            try:
+                success = known[runNumber]
+            except KeyError:
+                evaluator = createEvaluator(config, runNumber)
+                success = oneRun(runNumber, LTGA, evaluator, config)['success']
+                known[runNumber] = success
+            if not success:
                 failures += 1
                 if failures > config['bisectionFailureLimit']:
                     return False
         return True
 
+    def firstSuccessful(sizes):
+        try:
+            if "jobs" in config:
+                if config['verbose']:
+                    print 'Trying population sizes', sizes
+                return smallestSuccessful(config, sizes, outcomes)
+            for size in sizes:
+                config['popSize'] = size
+                if config['verbose']:
+                    print 'Trying population size', config['popSize']
+                if canSucceed(config):
+                    return size
+            return None
+        finally:
+            # Keeps completed runs even if interrupted
+            if filename is not None:
+                saveOutcomes(filename, config, outcomes)
+
     least, most = 0, 1
-    while True:
-        least = most
-        most *= 2
-        config['popSize'] = most
+    # Starts above the largest size known to fail
+    decided = {size: knownSuccess(config, runs)
+               for size, runs in outcomes.iteritems()}
+    failing = [size for size, success in decided.iteritems()
+               if success is False]
+    if failing:
+        most = max(failing)
+    passing = [size for size, success in decided.iteritems()
+               if success and size > most]
+    if passing:
+        least, most = most, min(passing)
         if config['verbose']:
-            print 'Trying population size', config['popSize']
-        if canSucceed(config):
+            print 'Known outcomes bound population size between', least,
+            print 'and', most
+    while not passing:
+        sizes = [most * 2 ** i
+                 for i in range(1, config.get("bisectionSizes", 1) + 1)]
+        found = firstSuccessful(sizes)
+        if found is not None:
+            least, most = found / 2, found
             break
+        most = sizes[-1]
     while least + 1 < most:
-        config['popSize'] = (most + least) / 2
-        if config['verbose']:
-            print 'Trying population size', config['popSize']
-        if canSucceed(config):
-            most = config['popSize']
+        size = (most + least) / 2
+        if firstSuccessful([size]) is not None:
+            most = size
         else:
-            least = config['popSize']
+            least = size
     config['popSize'] = most
     if config['verbose']:
         print 'Bisection set population size as', config['popSize']
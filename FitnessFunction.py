@@ -4,7 +4,20 @@ with solvers, as well as the definitions for a few benchmark problems
 '''
 import random
 import os
-from Util import binaryCounter, loadConfiguration, saveConfiguration
+import struct
+import numpy
+from Util import loadConfiguration
+from Individual import Genome
+try:
+    import fcntl
+except ImportError:
+    # File locking is not available on this platform
+    fcntl = None
+
+# Identifies binary NK instance files and the version of their layout
+NK_MAGIC = 'LTGANK01'
+# Binary NK instances start with the magic, n, k, minimum and maximum
+NK_HEADER = struct.Struct('<8sIIdd')
 
 
 class FitnessFunction(object):
@@ -26,6 +39,68 @@ class FitnessFunction(object):
         '''
         raise Exception("Fitness function did not override evaluate")
 
+    def evaluateBatch(self, genomes):
+        '''
+        Given a list or two dimensional array of genomes, return the list of
+        their fitness values.  By default calls ``evaluate`` on each genome,
+        but can be overridden to evaluate all of the genomes together.
+
+        Parameters:
+
+        - ``genomes``: The genomes to be evaluated, one per row.
+        '''
+        return [self.evaluate(genes) for genes in genomes]
+
+    def evaluateDelta(self, genes, changedIndices, previousFitness,
+                      key=None):
+        '''
+        Given a list of binary genes which differ from a previously evaluated
+        list of genes only at the changed indices, return the fitness of the
+        new genes.  By default calls ``evaluate``, but can be overridden to
+        only rescore the parts of the genome affected by the change.  Only
+        used when runs set the ``delta`` option, or by ``HillClimber.climb``.
+
+        Parameters:
+
+        - ``genes``: The list of genes to be evaluated.
+        - ``changedIndices``: The indices at which ``genes`` differ from the
+          previously evaluated genes.
+        - ``previousFitness``: The fitness of the previously evaluated genes.
+        - ``key``: Optional, the integer whose binary representation is
+          ``genes``, as given by ``int(individual)``.
+        '''
+        return self.evaluate(genes)
+
+    def subproblems(self, length):
+        '''
+        Returns the list of subproblems for genomes of the given length, each
+        a list of gene indices, such that the fitness of a genome is the
+        normalized sum of its subproblem scores.  Returns None if this
+        fitness function cannot be described in this way, which is the
+        default.
+
+        Parameters:
+
+        - ``length``: The number of genes in the genomes being scored.
+        '''
+        return None
+
+    def scoreSubproblem(self, index, genes):
+        '''
+        Empty function handle that throws an exception if not overridden.
+        Given the index of a subproblem returned by ``subproblems`` and a list
+        of genes, should return the unnormalized score of that subproblem.
+        '''
+        raise Exception("Fitness function did not override scoreSubproblem")
+
+    def normalizeTotal(self, genes, total):
+        '''
+        Empty function handle that throws an exception if not overridden.
+        Given a list of genes and the sum of their subproblem scores, should
+        return the same fitness as ``evaluate``.
+        '''
+        raise Exception("Fitness function did not override normalizeTotal")
+
     def subProblemsSolved(self, genes):
         '''
         Empty function handle that throws an exception if not overridden.
@@ -95,6 +170,105 @@ class DeceptiveTrap(FitnessFunction):
             fitness += self.scoreTrap(genes[i:i + self.trapSize])
         return self.normalize(genes, fitness)
 
+    def scoreTable(self):
+        '''
+        Returns an array such that entry ``i`` is the value of ``scoreTrap``
+        for a trap containing ``i`` ones.  Built the first time it is needed.
+        '''
+        try:
+            return self.scores
+        except AttributeError:
+            self.scores = numpy.array([self.scoreTrap([1] * ones + [0] *
+                                                      (self.trapSize - ones))
+                                       for ones in range(self.trapSize + 1)])
+            return self.scores
+
+    def evaluateBatch(self, genomes):
+        '''
+        Given a list or two dimensional array of binary genomes, return the
+        list of their normalized fitness values.  All traps of all genomes are
+        scored at once using ``scoreTable``.
+
+        Parameters:
+
+        - ``genomes``: The genomes to be evaluated, one per row.
+        '''
+        genomes = numpy.asarray(genomes, dtype=numpy.uint8)
+        if len(genomes) == 0 or genomes.shape[1] % self.trapSize != 0:
+            return FitnessFunction.evaluateBatch(self, genomes)
+        # Splits each genome into its traps and counts the ones in each
+        traps = genomes.reshape(len(genomes), -1, self.trapSize)
+        ones = traps.sum(axis=2, dtype=numpy.intp)
+        fitness = self.scoreTable()[ones].sum(axis=1)
+        # All genomes are the same length
+        return self.normalize(genomes[0], fitness).tolist()
+
+    def evaluateDelta(self, genes, changedIndices, previousFitness,
+                      key=None):
+        '''
+        Given a list of binary genes which differ from a previously evaluated
+        list of genes only at the changed indices, return the normalized
+        fitness of the new genes.  Only the traps containing changed genes are
+        rescored, and the result is identical to ``evaluate``.
+
+        Parameters:
+
+        - ``genes``: The list of genes to be evaluated.
+        - ``changedIndices``: The indices at which ``genes`` differ from the
+          previously evaluated genes.
+        - ``previousFitness``: The fitness of the previously evaluated genes.
+        - ``key``: Unused, as the changed traps are rescored from ``genes``.
+        '''
+        scores = self.scoreTable()
+        # Trap scores are integers, so the previous total is found exactly
+        fitness = int(round(previousFitness / self.normalize(genes, 1.0)))
+        # Finds how many more ones each changed trap has than before
+        gained = {}
+        for index in changedIndices:
+            start = index - index % self.trapSize
+            gained[start] = gained.get(start, 0) + (1 if genes[index] else -1)
+        for start, change in gained.iteritems():
+            ones = int(sum(genes[start:start + self.trapSize]))
+            fitness += scores.item(ones) - scores.item(ones - change)
+        return self.normalize(genes, fitness)
+
+    def subproblems(self, length):
+        '''
+        Returns the list of traps for genomes of the given length, each a list
+        of gene indices.
+
+        Parameters:
+
+        - ``length``: The number of genes in the genomes being scored.
+        '''
+        return [range(i, min(i + self.trapSize, length))
+                for i in xrange(0, length, self.trapSize)]
+
+    def scoreSubproblem(self, index, genes):
+        '''
+        Returns the score of a single trap in the list of genes.
+
+        Parameters:
+
+        - ``index``: Which trap to score, counting from the start of the
+          genes.
+        - ``genes``: The list of genes containing the trap.
+        '''
+        start = index * self.trapSize
+        return self.scoreTrap(genes[start:start + self.trapSize])
+
+    def normalizeTotal(self, genes, total):
+        '''
+        Returns the normalized fitness of genes whose trap scores sum to the
+        given total.
+
+        Parameters:
+
+        - ``genes``: The list of genes being evaluated.
+        - ``total``: The sum of all trap scores.
+        '''
+        return self.normalize(genes, total)
+
     def subProblemsSolved(self, genes):
         '''
         Returns a list of 0s and 1s indicating with of the traps contain the
@@ -185,6 +359,9 @@ class NearestNeighborNK(FitnessFunction):
         self.n = config['dimensions']
         problemNumber = config['problemSeed'] + runNumber
         self.buildProblem(config, problemNumber)
+        # Maps the integer key of genes recently used by ``evaluateDelta`` to
+        # their subproblem indices and their unrounded fitness
+        self.previous = {}
 
     def buildProblem(self, config, problemNumber):
         '''
@@ -203,6 +380,10 @@ class NearestNeighborNK(FitnessFunction):
           - ``k``: The amount of gene overlap in the subproblems.
           - ``nkProblemFolder``: The relative path to the folder where NK
             instances should be saved to and loaded from.
+
+        Instances are stored in the binary format used by ``saveProblem``.
+        Instances stored as JSON by earlier versions are converted the first
+        time they are used.
         '''
         # Creates a list of neighborhoods, such that subproblem ``i`` depends
         # on self.epistasis[i]
@@ -211,6 +392,32 @@ class NearestNeighborNK(FitnessFunction):
         key = "%(dimensions)i_%(k)i_" % config
         key += str(problemNumber)
         filename = config["nkProblemFolder"] + os.sep + key
+        try:
+            self.loadProblem(filename + ".nk")
+        except IOError:
+            # Only one process at a time creates each instance
+            with open(filename + ".lock", 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                try:
+                    # Another process may have created it while waiting
+                    self.loadProblem(filename + ".nk")
+                except IOError:
+                    self.createProblem(filename, problemNumber)
+
+    def createProblem(self, filename, problemNumber):
+        '''
+        Creates the NK instance for a problem number and saves it using
+        ``saveProblem``.  If the instance was stored as JSON by an earlier
+        version it is converted, otherwise the fitness matrix is generated
+        and ``solve`` is used to find the global minimum and maximum.
+
+        Parameters:
+
+        - ``filename``: The relative path to the instance, without an
+          extension.
+        - ``problemNumber``: The seed used to generate the fitness matrix.
+        '''
         try:
             loaded = loadConfiguration(filename)
             self.min, self.max, self.optimal, self.fitness = loaded
@@ -219,10 +426,81 @@ class NearestNeighborNK(FitnessFunction):
             # Creates a random fitness matrix based on the problem number
             self.fitness = [[rng.random() for _ in range(2 ** (self.k + 1))]
                             for _ in xrange(self.n)]
-            self.min, _ = self.solve(min)
-            self.max, self.optimal = self.solve(max)
-            saveConfiguration(filename, (self.min, self.max,
-                                         self.optimal, self.fitness))
+            self.min, self.max, self.optimal = self.solve()
+        self.saveProblem(filename + ".nk")
+        self.loadProblem(filename + ".nk")
+
+    def saveProblem(self, filename):
+        '''
+        Saves this NK instance in a binary format which can be memory mapped.
+        The file contains ``NK_HEADER``, one byte per gene of the optimal
+        genes, padding to a multiple of 8 bytes, and then the fitness matrix
+        as little endian 64 bit floats, one row per subproblem.  The file is
+        replaced in one step so readers never see partial data.
+
+        Parameters:
+
+        - ``filename``: The relative path to the file to be written to.
+        '''
+        header = NK_HEADER.pack(NK_MAGIC, self.n, self.k, self.min, self.max)
+        optimal = numpy.array(self.optimal, dtype=numpy.uint8).tostring()
+        padding = -(len(header) + len(optimal)) % 8
+        temporary = filename + ".%i.tmp" % os.getpid()
+        with open(temporary, 'wb') as f:
+            f.write(header + optimal + '\0' * padding)
+            f.write(numpy.array(self.fitness, dtype='<f8').tostring())
+        os.rename(temporary, filename)
+
+    def loadProblem(self, filename):
+        '''
+        Loads a NK instance saved by ``saveProblem``.  The fitness matrix is
+        memory mapped read only, so processes using the same instance share
+        a single copy of it.  Raises an IOError if the file does not exist
+        or does not contain an instance of the correct size.
+
+        Parameters:
+
+        - ``filename``: The relative path to the file to be loaded.
+        '''
+        with open(filename, 'rb') as f:
+            header = f.read(NK_HEADER.size)
+            if len(header) < NK_HEADER.size:
+                raise IOError("Incomplete NK instance: " + filename)
+            magic, n, k, self.min, self.max = NK_HEADER.unpack(header)
+            if magic != NK_MAGIC or (n, k) != (self.n, self.k):
+                raise IOError("Not a matching NK instance: " + filename)
+            self.optimal = map(ord, f.read(n))
+        offset = NK_HEADER.size + n + (-(NK_HEADER.size + n) % 8)
+        mapped = numpy.memmap(filename, dtype='<f8', mode='r', offset=offset,
+                              shape=(n, 2 ** (k + 1)))
+        # Indexing a plain array view of the map is several times faster than
+        # indexing the memmap itself, and still shares the same memory
+        self.table = numpy.asarray(mapped)
+        self.fitness = self.table
+        self.filename = filename
+
+    def __getstate__(self):
+        '''
+        Used when pickling, for instance to send this fitness function to a
+        worker process.  The fitness matrix is left out, as ``__setstate__``
+        memory maps it again instead of copying it.
+        '''
+        state = dict(self.__dict__)
+        del state['table']
+        del state['fitness']
+        return state
+
+    def __setstate__(self, state):
+        '''
+        Used when unpickling, restores the state saved by ``__getstate__``
+        and memory maps the fitness matrix from the instance file.
+
+        Parameters:
+
+        - ``state``: The dictionary returned by ``__getstate__``.
+        '''
+        self.__dict__.update(state)
+        self.loadProblem(self.filename)
 
     def evaluate(self, genes):
         '''
@@ -233,13 +511,153 @@ class NearestNeighborNK(FitnessFunction):
 
         - ``genes``: The list of genes to be evaluated.
         '''
-        fitness = 0
-        for g, ep in enumerate(self.epistasis):
-            # Convert the genes into a integer used to index the fitness matrix
-            scalarized = int(''.join(map(str, [genes[x] for x in ep])), 2)
-            fitness += self.fitness[g][scalarized]
+        return self.normalize(self.total(genes))
+
+    def normalize(self, fitness):
+        '''
+        Scales a sum of subproblem fitness values into the range [0-1], such
+        that 1 is the global optimum.
+
+        Parameters:
+
+        - ``fitness``: The sum of subproblem fitness values.
+        '''
         return round((fitness - self.min) / (self.max - self.min), 6)
 
+    def total(self, genes):
+        '''
+        Given a list of binary genes, return the sum of the fitness of all
+        subproblems.
+
+        Parameters:
+
+        - ``genes``: The list of genes to be evaluated.
+        '''
+        width = self.k + 1
+        mask = (1 << width) - 1
+        # Convert the first neighborhood into an integer used to index the
+        # fitness matrix
+        scalarized = 0
+        for gene in genes[:width]:
+            scalarized = (scalarized << 1) | gene
+        # Each following neighborhood drops its first gene and gains the
+        # gene after its end, wrapping around the genome
+        wrapped = list(genes[width:]) + list(genes[:width])
+        # Reading Python floats out of the flattened matrix avoids creating
+        # a row view and a NumPy scalar for every subproblem
+        item = self.table.ravel().item
+        size = mask + 1
+        offset = 0
+        fitness = 0
+        for gene in wrapped:
+            fitness += item(offset + scalarized)
+            scalarized = ((scalarized << 1) & mask) | gene
+            offset += size
+        return fitness
+
+    def neighborhoods(self, genes):
+        '''
+        Given a list of binary genes, return the list of fitness matrix
+        indices for each subproblem, and the sum of the fitness of all
+        subproblems.
+
+        Parameters:
+
+        - ``genes``: The list of genes to be examined.
+        '''
+        width = self.k + 1
+        mask = (1 << width) - 1
+        scalarized = 0
+        for gene in genes[:width]:
+            scalarized = (scalarized << 1) | gene
+        wrapped = list(genes[width:]) + list(genes[:width])
+        item = self.table.ravel().item
+        size = mask + 1
+        offset = 0
+        indices = []
+        fitness = 0
+        for gene in wrapped:
+            indices.append(scalarized)
+            fitness += item(offset + scalarized)
+            scalarized = ((scalarized << 1) & mask) | gene
+            offset += size
+        return indices, fitness
+
+    def evaluateDelta(self, genes, changedIndices, previousFitness,
+                      key=None):
+        '''
+        Given a list of binary genes which differ from a previously evaluated
+        list of genes only at the changed indices, return the normalized
+        fitness of the new genes.  Only the subproblems containing changed
+        genes are rescored.  As normalized fitness is rounded, the unrounded
+        total and subproblem indices of recently used previous genes are
+        remembered by the previous genes' integer key, which is found from
+        ``key`` by flipping the changed bits.  The result is equal to
+        ``evaluate`` up to floating point rounding.
+
+        Parameters:
+
+        - ``genes``: The list of genes to be evaluated.
+        - ``changedIndices``: The indices at which ``genes`` differ from the
+          previously evaluated genes.
+        - ``previousFitness``: The fitness of the previously evaluated genes.
+        - ``key``: Optional, the integer whose binary representation is
+          ``genes``, as given by ``int(individual)``.  Found from the
+          genes if not given.
+        '''
+        if 2 * len(changedIndices) * (self.k + 1) > self.n:
+            return self.evaluate(genes)
+        if key is None:
+            key = Genome(genes).key
+        previousKey = key
+        for index in changedIndices:
+            previousKey ^= 1 << (self.n - 1 - index)
+        try:
+            indices, fitness = self.previous[previousKey]
+        except KeyError:
+            previous = list(genes)
+            for index in changedIndices:
+                previous[index] = 1 - previous[index]
+            indices, fitness = self.neighborhoods(previous)
+            # Only a few recently used genes are needed
+            if len(self.previous) >= 16:
+                self.previous.clear()
+            self.previous[previousKey] = indices, fitness
+        # Subproblem g contains genes g through g + k, with g the highest bit
+        changed = {}
+        for index in changedIndices:
+            for i in range(self.k + 1):
+                g = (index - i) % self.n
+                changed[g] = changed.get(g, indices[g]) ^ (1 << (self.k - i))
+        table = self.table
+        for g in sorted(changed):
+            fitness += table.item(g, changed[g]) - table.item(g, indices[g])
+        return self.normalize(fitness)
+
+    def evaluateBatch(self, genomes):
+        '''
+        Given a list or two dimensional array of binary genomes, return the
+        list of their normalized fitness values.  The neighborhoods of all
+        genomes are converted into fitness matrix indices at once.
+
+        Parameters:
+
+        - ``genomes``: The genomes to be evaluated, one per row.
+        '''
+        genomes = numpy.asarray(genomes, dtype=numpy.intp)
+        if len(genomes) == 0:
+            return []
+        # indices[i, g] is the neighborhood of subproblem g in genome i
+        indices = numpy.zeros_like(genomes)
+        for i in range(self.k + 1):
+            indices <<= 1
+            indices |= numpy.roll(genomes, -i, axis=1)
+        fitness = numpy.zeros(len(genomes))
+        # Adds subproblems in the same order as ``evaluate``
+        for g in xrange(self.n):
+            fitness += self.table[g, indices[:, g]]
+        return [self.normalize(value) for value in fitness.tolist()]
+
     def getFitness(self, g, neighborhood):
         '''
         Given a gene index and the list of gene values in its neighborhood,
@@ -250,7 +668,45 @@ class NearestNeighborNK(FitnessFunction):
         - ``g``: The subproblem to get the fitness for.
         - ``neighborhood``: The gene values contained in that subproblem
         '''
-        return self.fitness[g][int(''.join(map(str, neighborhood)), 2)]
+        scalarized = 0
+        for gene in neighborhood:
+            scalarized = (scalarized << 1) | gene
+        return self.table.item(g, scalarized)
+
+    def subproblems(self, length):
+        '''
+        Returns the neighborhood of each subproblem, which is ``k + 1``
+        consecutive genes wrapping around the end of the genome.
+
+        Parameters:
+
+        - ``length``: The number of genes in the genomes being scored.
+        '''
+        return self.epistasis
+
+    def scoreSubproblem(self, index, genes):
+        '''
+        Returns the fitness of a single subproblem in the list of genes.
+
+        Parameters:
+
+        - ``index``: Which subproblem to score.
+        - ``genes``: The list of genes containing the subproblem.
+        '''
+        return self.getFitness(index, [genes[g]
+                                       for g in self.epistasis[index]])
+
+    def normalizeTotal(self, genes, total):
+        '''
+        Returns the normalized fitness of genes whose subproblem fitness
+        values sum to the given total.
+
+        Parameters:
+
+        - ``genes``: The list of genes being evaluated.
+        - ``total``: The sum of all subproblem fitness values.
+        '''
+        return self.normalize(total)
 
     def subProblemsSolved(self, genes):
         '''
@@ -264,67 +720,72 @@ class NearestNeighborNK(FitnessFunction):
         return [int(all(genes[g] == self.optimal[g] for g in subProblem))
                 for subProblem in self.epistasis]
 
-    def solve(self, extreme):
-        '''
-        Returns the optimal value for this NK instance in polynomial time
-        using dynamic programming.  For full explanation for how this
-        algorithm works see:
-
-        A. H. Wright, R. K. Thompson, and J. Zhang. The computational
-        complexity of N-K fitness functions. IEEE Trans. on Evolutionary
-        Computation, 4(4):373-379, 2000
-
-        Parameters:
-
-        - ``extreme``: A function that selects which fitness extreme is being
-          solved for.  For instance, ``min`` or ``max``.
-        '''
-        # A dictionary mapping gene values for parts of the genome to their
-        # fitness values
-        known = {}
-
-        def multiF(chunk, a, b):
-            '''
-            Internal function used to determine the fitness of a chunk of the
-            genome.
-
-            Parameters:
-
-            - ``chuck``: Tuple of gene indices.
-            - ``a``: First part of the gene settings for these indices.
-            - ``b``: Second part of the gene settings for these indices.
-            '''
-            key = (chunk, a, b)
-            try:
-                return known[key]
-            except:
-                genewrap = (a + b) * 2
-                known[key] = sum(self.getFitness(chunk * self.k + g,
-                                                 genewrap[g:g + self.k + 1])
-                                 for g in range(self.k))
-                return known[key]
-
-        for n in range(self.n / self.k - 1, 1, -1):
-            v, u = {}, {}
-            for a in binaryCounter(self.k):
-                for c in binaryCounter(self.k):
-                    u[a, c], v[a, c] = extreme((multiF(n - 1, a, b) +
-                                                multiF(n, b, c), b)
-                                               for b in binaryCounter(self.k))
-            for a in binaryCounter(self.k):
-                for c in binaryCounter(self.k):
-                    known[n - 1, a, c] = u[a, c]
-                    known[n, a, c] = v[a, c]
-
-        fitness, a, c = extreme((multiF(0, a, c) +
-                                 multiF(1, c, a), a, c)
-                                for c in binaryCounter(self.k)
-                                for a in binaryCounter(self.k))
-
-        # Recreates the entire genome that receives the extreme fitness
-        optimalString = a + c
-        last = c
-        for i in range(2, self.n / self.k):
-            last = known[i, last, a]
-            optimalString += last
-        return fitness, map(int, optimalString)
+    def solve(self):
+        '''
+        Returns the minimum fitness, the maximum fitness and the genes which
+        achieve the maximum for this NK instance in polynomial time using
+        dynamic programming.  The genome is built one gene at a time, with each
+        state being the integer formed by the last ``k`` genes set, first gene
+        as the most significant bit.  As the subproblems at the end of the
+        genome wrap around to the start, every setting of the first ``k``
+        genes is solved for in parallel, and both extremes are found in the
+        same pass.  Requires O(n 4^k) time, O(4^k + n 2^k) memory, that ``k``
+        is at least 1 and that ``n`` is at least ``2k``.
+        '''
+        k, states = self.k, 2 ** self.k
+        if k < 1:
+            raise Exception("NK solver requires k >= 1, found k=%i" % k)
+        if self.n < 2 * k:
+            raise Exception("NK solver requires n >= 2k, found n=%i k=%i"
+                            % (self.n, k))
+        table = numpy.array(self.fitness, dtype=float)
+        # Subproblem g has settings (top << k) | state, where top is gene g and
+        # state is the k genes following it, so the state before gene g + k
+        # is set can only be one of these two
+        state = numpy.arange(states)
+        zeroTop, oneTop = state >> 1, (state >> 1) | (states >> 1)
+        # lowest[p, s] and highest[p, s] are the extreme totals of the
+        # completed subproblems when the first k genes are p and the last k
+        # genes set are s
+        lowest = numpy.full((states, states), numpy.inf)
+        numpy.fill_diagonal(lowest, 0.0)
+        highest = -lowest
+        zero, one = numpy.empty_like(lowest), numpy.empty_like(lowest)
+        for g in xrange(self.n - k):
+            # Updates in place, as these arrays are large when k is large
+            for totals, extreme in ((lowest, numpy.minimum),
+                                    (highest, numpy.maximum)):
+                numpy.take(totals, zeroTop, axis=1, out=zero)
+                zero += table[g, :states]
+                numpy.take(totals, oneTop, axis=1, out=one)
+                one += table[g, states:]
+                extreme(zero, one, out=totals)
+        # The last k subproblems read the last k genes followed by the first k
+        window = (state[numpy.newaxis, :] << k) | state[:, numpy.newaxis]
+        closing = numpy.zeros((states, states))
+        for t in xrange(k):
+            settings = (window >> (k - 1 - t)) & (2 * states - 1)
+            closing += table[self.n - k + t][settings]
+        lowest += closing
+        highest += closing
+        first, last = divmod(int(highest.argmax()), states)
+
+        # Repeats the maximization for only the best start, remembering which
+        # top gene value each state came from
+        best = numpy.full(states, -numpy.inf)
+        best[first] = 0.0
+        fromOne = numpy.empty((self.n - k, states), dtype=bool)
+        for g in xrange(self.n - k):
+            zero = best[zeroTop] + table[g, :states]
+            one = best[oneTop] + table[g, states:]
+            fromOne[g] = one > zero
+            best = numpy.where(fromOne[g], one, zero)
+
+        # Recreates the entire genome that receives the maximum fitness
+        optimal = [(first >> (k - 1 - i)) & 1 for i in range(k)]
+        optimal += [0] * (self.n - k)
+        current = last
+        for g in xrange(self.n - k - 1, -1, -1):
+            optimal[g + k] = current & 1
+            current = (current >> 1) | (int(fromOne[g, current]) << (k - 1))
+        return (float(lowest.min()), float(highest[first, last]), optimal)
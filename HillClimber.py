@@ -1,9 +1,10 @@
 '''
 This module contains coroutines designed to perform different types of hill
-climbing as well as a function to perform a complete climb of a single set
+climbing as well as functions to perform a complete climb of a single set
 of genes.
 '''
 import random
+import numpy
 
 
 def steepestAscentHillClimber(genes):
@@ -11,7 +12,9 @@ def steepestAscentHillClimber(genes):
     Given a initial list of binary genes, create a generator designed to yield
     each step in a steepest ascent hill climb.  Modifies the genes in place,
     such that when iteration ends the ``genes`` list contains the best found
-    individual.
+    individual.  After the initial genes, each step is yielded as a tuple of
+    the genes, the list of indices changed since the last accepted genes,
+    and the fitness of the last accepted genes.
 
     Parameters:
 
@@ -20,6 +23,7 @@ def steepestAscentHillClimber(genes):
     '''
     bestScore = yield genes
     while True:
+        currentScore = bestScore
         bestIndex = -1
         indicies = range(len(genes))
         # Breaks ties randomly
@@ -27,7 +31,7 @@ def steepestAscentHillClimber(genes):
         for index in indicies:
             # flip the bit at that index
             genes[index] = 1 - genes[index]
-            score = yield genes
+            score = yield genes, [index], currentScore
             if bestScore < score:
                 bestScore = score
                 bestIndex = index
@@ -44,23 +48,174 @@ def climb(genes, evaluator, method):
     Improves the fitness of a list of binary genes using the given method on
     the specified evaluation function.  Modifies the genes in place and returns
     how many hill climbing evaluations were required to optimize the genes.
+    If the method yields a tuple of genes, changed indices and previous
+    fitness, the genes are evaluated using ``evaluator.evaluateDelta``, or
+    using ``evaluator.evaluate`` if the evaluator does not provide it.
 
     Parameters:
 
     - ``genes``: The initial list of binary genes to improve using hill
       climbing.
-    - ``evaluator``: A function that takes in a list of genes and returns its
-      fitness.
+    - ``evaluator``: A ``FitnessFunction``, or any object with an
+      ``evaluate`` method, used to find the fitness of genes.
     - ``method``: The hill climbing coroutine to be used.  For instance
       ``steepestAscentHillClimbing``.
     '''
     climber = method(genes)
     iteration = climber.next()
     counter = 0
+    delta = getattr(evaluator, 'evaluateDelta', None)
     while True:
         counter += 1
         try:
-            iteration = climber.send(evaluator.evaluate(iteration))
+            if isinstance(iteration, tuple):
+                if delta is None:
+                    fitness = evaluator.evaluate(iteration[0])
+                else:
+                    fitness = delta(*iteration)
+            else:
+                fitness = evaluator.evaluate(iteration)
+            iteration = climber.send(fitness)
         except StopIteration:
             break
     return counter
+
+
+def gainTableClimb(genes, evaluator):
+    '''
+    Performs the same steepest ascent hill climb as
+    ``steepestAscentHillClimber`` without evaluating every bit flip.  The
+    change in score caused by flipping each gene is stored in a table, built
+    from the subproblems described by ``evaluator.subproblems``.  After a
+    flip only the subproblems containing the flipped gene are rescored.
+    Modifies the genes in place and returns how many evaluations the
+    equivalent ``climb`` would have required.  Falls back to ``climb`` if
+    the evaluator does not describe its subproblems.
+
+    Parameters:
+
+    - ``genes``: The initial list of binary genes to improve using hill
+      climbing.
+    - ``evaluator``: A ``FitnessFunction`` used to score the genes.
+    '''
+    subproblems = evaluator.subproblems(len(genes))
+    if subproblems is None:
+        return climb(genes, evaluator, steepestAscentHillClimber)
+    # containing[g] is the list of subproblems that include gene g
+    containing = [[] for _ in genes]
+    for s, subproblem in enumerate(subproblems):
+        for g in subproblem:
+            containing[g].append(s)
+    scores = [evaluator.scoreSubproblem(s, genes)
+              for s in range(len(subproblems))]
+    # change[s][g] is how much the score of s changes if gene g is flipped
+    change = [{} for _ in subproblems]
+
+    def rescore(s):
+        '''
+        Internal function used to recalculate the score of a subproblem and
+        the change caused by flipping each of its genes.
+
+        Parameters:
+
+        - ``s``: The index of the subproblem to rescore.
+        '''
+        scores[s] = evaluator.scoreSubproblem(s, genes)
+        for g in subproblems[s]:
+            genes[g] = 1 - genes[g]
+            change[s][g] = evaluator.scoreSubproblem(s, genes) - scores[s]
+            genes[g] = 1 - genes[g]
+
+    for s in range(len(subproblems)):
+        rescore(s)
+    gains = [sum(change[s][g] for s in containing[g])
+             for g in range(len(genes))]
+    # Counts the evaluation of the initial genes
+    counter = 1
+    while True:
+        # Each iteration is equivalent to evaluating every bit flip
+        counter += len(genes)
+        total = sum(scores)
+        bestScore = evaluator.normalizeTotal(genes, total)
+        bestGain = 0
+        bestIndex = -1
+        indicies = range(len(genes))
+        # Breaks ties randomly
+        random.shuffle(indicies)
+        for index in indicies:
+            gain = gains[index]
+            # Normalization never reverses the order of two totals
+            if bestGain < gain:
+                score = evaluator.normalizeTotal(genes, total + gain)
+                if bestScore < score:
+                    bestScore = score
+                    bestGain = gain
+                    bestIndex = index
+        if bestIndex == -1:
+            break
+        genes[bestIndex] = 1 - genes[bestIndex]
+        # Only genes sharing a subproblem with the flipped gene change gain
+        affected = set()
+        for s in containing[bestIndex]:
+            rescore(s)
+            affected.update(subproblems[s])
+        for g in affected:
+            gains[g] = sum(change[s][g] for s in containing[g])
+    return counter
+
+
+def batchClimb(genomes, evaluator, limit=2 ** 16):
+    '''
+    Performs steepest ascent hill climbing on many lists of binary genes at
+    once.  Each iteration evaluates every single bit flip of every genome
+    still being climbed using ``evaluator.evaluateBatch``, and then applies
+    each genome's best improving flip, breaking ties randomly.  Genomes
+    with no improving flip stop climbing.  Modifies the genes in place and
+    returns the list of how many evaluations each genome required, counted
+    the same way as ``climb``.
+
+    Parameters:
+
+    - ``genomes``: The list of initial gene lists to improve using hill
+      climbing.  All must be the same length.
+    - ``evaluator``: A ``FitnessFunction`` used to find the fitness of genes.
+    - ``limit``: The most genomes to pass to a single call of
+      ``evaluator.evaluateBatch``.
+    '''
+    if len(genomes) == 0:
+        return []
+    matrix = numpy.array(genomes, dtype=numpy.uint8)
+    rows, length = matrix.shape
+    fitness = numpy.array(evaluator.evaluateBatch(matrix), dtype=float)
+    iterations = numpy.zeros(rows, dtype=int)
+    rng = numpy.random.RandomState(random.getrandbits(32))
+    diagonal = numpy.arange(length)
+    step = max(1, limit // length)
+    active = numpy.arange(rows)
+    while active.size > 0:
+        iterations[active] += 1
+        improving = []
+        for start in xrange(0, active.size, step):
+            chunk = active[start:start + step]
+            # flipped[r, i] is genome chunk[r] with bit i flipped
+            flipped = numpy.repeat(matrix[chunk, numpy.newaxis, :], length,
+                                   axis=1)
+            flipped[:, diagonal, diagonal] ^= 1
+            scores = numpy.array(evaluator.evaluateBatch(
+                flipped.reshape(-1, length)), dtype=float)
+            scores = scores.reshape(len(chunk), length)
+            best = scores.max(axis=1)
+            # Breaks ties randomly
+            keys = rng.random_sample(scores.shape)
+            keys[scores != best[:, numpy.newaxis]] = -1
+            choice = keys.argmax(axis=1)
+            improved = fitness[chunk] < best
+            chunk = chunk[improved]
+            matrix[chunk, choice[improved]] ^= 1
+            fitness[chunk] = best[improved]
+            improving.append(chunk)
+        active = numpy.concatenate(improving)
+    for genes, climbed in zip(genomes, matrix.tolist()):
+        genes[:] = climbed
+    # Evaluates the initial genes and every flip in each iteration
+    return (1 + iterations * length).tolist()
@@ -2,6 +2,115 @@
 Simple module containing individual object implementations.
 '''
 import sys
+import binascii
+import string
+import numpy
+
+# Converts a string of 0 and 1 bytes into a string of '0' and '1' characters
+DIGITS = string.maketrans('\x00\x01', '01')
+# Converts a string of '0' and '1' characters into a string of 0 and 1 bytes
+BYTES = string.maketrans('01', '\x00\x01')
+
+
+def rescalarized(method):
+    '''
+    Wraps a ``bytearray`` method which may move, add or remove genes, such
+    that the genome's key is found again after calling it.
+
+    Parameters:
+
+    - ``method``: The unbound ``bytearray`` method to wrap.
+    '''
+    def changed(self, *args):
+        result = method(self, *args)
+        self.key = self.scalarize()
+        return result
+    changed.__name__ = method.__name__
+    changed.__doc__ = method.__doc__
+    return changed
+
+
+class Genome(bytearray):
+    '''
+    A list of binary genes stored using one byte per gene.  Keeps ``key``, the
+    integer whose binary representation is the genes, current as genes are
+    set so that it never needs to be recalculated.  Every other way of
+    changing the genes finds the key again.
+    '''
+    __slots__ = ('key',)
+
+    append = rescalarized(bytearray.append)
+    extend = rescalarized(bytearray.extend)
+    insert = rescalarized(bytearray.insert)
+    pop = rescalarized(bytearray.pop)
+    remove = rescalarized(bytearray.remove)
+    reverse = rescalarized(bytearray.reverse)
+    __delitem__ = rescalarized(bytearray.__delitem__)
+    __iadd__ = rescalarized(bytearray.__iadd__)
+    __imul__ = rescalarized(bytearray.__imul__)
+
+    def __init__(self, genes=()):
+        '''
+        Create a new genome containing a copy of the given genes.
+
+        Parameters:
+
+        - ``genes``: The list of binary genes to copy.  Defaults to empty.
+        '''
+        bytearray.__init__(self, genes)
+        self.key = self.scalarize()
+
+    @classmethod
+    def fromKey(cls, key, length):
+        '''
+        Create a new genome whose genes are the binary representation of the
+        given key, without recalculating the key.
+
+        Parameters:
+
+        - ``key``: The integer representation of the genes.
+        - ``length``: The number of genes in the genome.
+        '''
+        genome = cls.__new__(cls)
+        bits = format(key, '0%ib' % length)
+        bytearray.__init__(genome, bits.translate(BYTES))
+        genome.key = key
+        return genome
+
+    def scalarize(self):
+        '''
+        Returns the integer whose binary representation is the genes, found
+        by examining every gene.
+        '''
+        if len(self) == 0:
+            return 0
+        return int(str(self).translate(DIGITS), 2)
+
+    def __setitem__(self, index, value):
+        '''
+        Sets the gene or slice of genes at the given index, updating ``key``
+        to match.
+
+        Parameters:
+
+        - ``index``: The index or slice of the genes being set.
+        - ``value``: The new gene value, or values if ``index`` is a slice.
+        '''
+        if isinstance(index, slice):
+            bytearray.__setitem__(self, index, value)
+            self.key = self.scalarize()
+        else:
+            if self[index] != value:
+                # Flip the key's bit associated with this gene
+                self.key ^= 1 << (len(self) - 1 - index % len(self))
+            bytearray.__setitem__(self, index, value)
+
+    def __reduce__(self):
+        '''
+        Used by ``pickle`` and ``copy`` to recreate this genome from a copy
+        of its genes.
+        '''
+        return (self.__class__, (str(self),))
 
 
 class Individual(object):
@@ -9,6 +118,8 @@ class Individual(object):
     A basic individual object used to combine gene fitness with genomes, as
     well as some basic utility functions.
     '''
+    __slots__ = ('genes', 'fitness')
+
     def __init__(self, genes=[], fitness=1 - sys.maxint):
         '''
         Create a new individual instance with optional arguments for initial
@@ -16,13 +127,43 @@ class Individual(object):
 
         Parameters:
 
-        - ``genes``: The list of genes for the individual.  Defaults to empty.
+        - ``genes``: The list of genes for the individual, which is copied
+          into a ``Genome``.  Defaults to empty.
         - ``fitness``: The fitness for the individual.  Defaults to very
           negative.
         '''
-        self.genes = genes
+        self.genes = Genome(genes)
         self.fitness = fitness
 
+    def __getstate__(self):
+        '''
+        Used by ``pickle`` and ``copy``, as individuals have no ``__dict__``.
+        Returns the genes and fitness.
+        '''
+        return self.genes, self.fitness
+
+    def __setstate__(self, state):
+        '''
+        Used by ``pickle`` and ``copy`` to restore the state returned by
+        ``__getstate__``.
+
+        Parameters:
+
+        - ``state``: A tuple of the genes and fitness.
+        '''
+        self.genes, self.fitness = state
+
+    def setGene(self, index, value):
+        '''
+        Sets a single gene, keeping ``int(self)`` current.
+
+        Parameters:
+
+        - ``index``: The index of the gene.
+        - ``value``: The new value of the gene.
+        '''
+        self.genes[index] = value
+
     def __cmp__(self, other):
         '''
         Compares to individuals based on their fitness.  Two individuals with
@@ -51,9 +192,10 @@ class Individual(object):
     def __int__(self):
         '''
         Converts a binary individual's genes into a single integer.  Useful
-        for uniqueness checking.
+        for uniqueness checking.  As the genome keeps this value current it is
+        not recalculated.
         '''
-        return int("".join(map(str, self.genes)), 2)
+        return self.genes.key
 
     def __hash__(self):
         '''
@@ -61,3 +203,222 @@ class Individual(object):
         individuals.
         '''
         return int(self)
+
+
+class RowIndividual(Individual):
+    '''
+    An individual whose genes and fitness are stored in a row of a
+    ``PopulationMatrix``.  Changes to the genes or fitness of this individual
+    are written directly into the matrix.  Its genes are a read only array
+    unpacked from the row, so genes are changed using ``setGene`` or by
+    assigning all of them, which keeps the population's key for the row
+    current.
+    '''
+    __slots__ = ('population', 'index')
+
+    def __init__(self, population, index):
+        '''
+        Create a view of a single row in a population matrix.
+
+        Parameters:
+
+        - ``population``: The ``PopulationMatrix`` containing this individual.
+        - ``index``: Which row of the population this individual is stored in.
+        '''
+        self.population = population
+        self.index = index
+
+    def __int__(self):
+        '''
+        Converts the row's genes into a single integer.  The population
+        stores this value for each row and keeps it current as single genes
+        are set, so it is only found from the packed row after all of a
+        row's genes are assigned.
+        '''
+        key = self.population.keys[self.index]
+        if key is None:
+            packed = self.population.packed[self.index].tostring()
+            # Removes the zero bits used to pad the last byte
+            key = (int(binascii.hexlify(packed), 16) >>
+                   (-self.population.length % 8))
+            self.population.keys[self.index] = key
+        return key
+
+    @property
+    def genes(self):
+        '''
+        The read only array of genes for this individual, unpacked from the
+        row.
+        '''
+        packed = self.population.packed[self.index]
+        genes = numpy.unpackbits(packed)[:self.population.length]
+        genes.flags.writeable = False
+        return genes
+
+    @genes.setter
+    def genes(self, genes):
+        genes = numpy.array(genes, dtype=numpy.uint8)
+        self.population.packed[self.index] = numpy.packbits(genes)
+        self.population.keys[self.index] = None
+
+    def setGene(self, index, value):
+        '''
+        Sets a single gene in the row, updating the population's key for the
+        row to match.
+
+        Parameters:
+
+        - ``index``: The index of the gene.
+        - ``value``: The new value of the gene.
+        '''
+        length = self.population.length
+        index = int(index) % length
+        byte, bit = divmod(index, 8)
+        packed = self.population.packed[self.index]
+        if (packed[byte] >> (7 - bit)) & 1 != value:
+            packed[byte] ^= 1 << (7 - bit)
+            key = self.population.keys[self.index]
+            if key is not None:
+                # Flip the key's bit associated with this gene
+                key ^= 1 << (length - 1 - index)
+                self.population.keys[self.index] = key
+
+    def __reduce__(self):
+        '''
+        Used by ``pickle`` and ``copy``, which create an ``Individual`` with
+        a copy of this individual's genes and fitness.
+        '''
+        return (Individual, (self.genes.tolist(), self.fitness))
+
+    @property
+    def fitness(self):
+        '''
+        The fitness of this individual.
+        '''
+        return float(self.population.fitness[self.index])
+
+    @fitness.setter
+    def fitness(self, fitness):
+        self.population.fitness[self.index] = fitness
+
+
+class PopulationMatrix(object):
+    '''
+    A list like container of individuals which stores all genes in a single
+    contiguous array, packed eight genes to a byte, and all fitness values
+    in a parallel array.  Retrieving an individual returns a
+    ``RowIndividual`` view of its row, and storing an individual copies its
+    genes and fitness into the matrix.
+    '''
+    def __init__(self, individuals=[]):
+        '''
+        Create a new population matrix, optionally containing copies of the
+        given individuals.
+
+        Parameters:
+
+        - ``individuals``: The individuals to initially store.  Defaults to
+          empty.
+        '''
+        # packed[i] is the genes of individual i, as given by numpy.packbits
+        self.packed = None
+        self.length = 0
+        self.fitness = None
+        # keys[i] is int(self[i]), or None if it needs to be found again
+        self.keys = []
+        self.size = 0
+        for individual in individuals:
+            self.append(individual)
+
+    def append(self, individual):
+        '''
+        Copies an individual into a new row at the end of the population.
+        Doubles the storage used whenever the population outgrows it.
+
+        Parameters:
+
+        - ``individual``: The individual to be copied.
+        '''
+        if self.packed is None:
+            self.length = len(individual.genes)
+            self.packed = numpy.empty((1, -(-self.length // 8)),
+                                      dtype=numpy.uint8)
+            self.fitness = numpy.empty(1)
+        elif self.size == len(self.packed):
+            # Only the stored rows are copied, so memory for the new rows is
+            # not used until they are filled
+            packed = numpy.empty((2 * self.size, self.packed.shape[1]),
+                                 dtype=numpy.uint8)
+            packed[:self.size] = self.packed
+            fitness = numpy.empty(2 * self.size)
+            fitness[:self.size] = self.fitness
+            self.packed, self.fitness = packed, fitness
+        self.size += 1
+        self.keys.append(None)
+        self[self.size - 1] = individual
+
+    def matrix(self):
+        '''
+        Returns a new array of genes for the individuals currently stored,
+        such that row ``i`` contains the genes of individual ``i``.
+        '''
+        genes = numpy.unpackbits(self.packed[:self.size], axis=1)
+        return genes[:, :self.length]
+
+    def position(self, index):
+        '''
+        Converts a possibly negative index into a row number, raising an
+        ``IndexError`` if no individual is stored at that index.
+
+        Parameters:
+
+        - ``index``: The index of an individual in the population.
+        '''
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("population index out of range")
+        return index
+
+    def __len__(self):
+        '''
+        Returns the number of individuals currently stored.
+        '''
+        return self.size
+
+    def __getitem__(self, index):
+        '''
+        Returns a ``RowIndividual`` view of the individual at the index.
+
+        Parameters:
+
+        - ``index``: The index of the individual to retrieve.
+        '''
+        return RowIndividual(self, self.position(index))
+
+    def __setitem__(self, index, individual):
+        '''
+        Copies the genes and fitness of an individual into the given index.
+        The genes are packed from the individual's key.
+
+        Parameters:
+
+        - ``index``: The index to store the individual at.
+        - ``individual``: The individual to be copied.
+        '''
+        row = self.position(index)
+        key = int(individual)
+        width = self.packed.shape[1]
+        # Pads the last byte with zero bits, as numpy.packbits does
+        digits = '%0*x' % (2 * width, key << (-self.length % 8))
+        self.packed[row] = numpy.frombuffer(binascii.unhexlify(digits),
+                                            dtype=numpy.uint8)
+        self.fitness[row] = individual.fitness
+        self.keys[row] = key
+
+    def __iter__(self):
+        '''
+        Iterates over views of each individual in the population.
+        '''
+        for index in xrange(self.size):
+            yield RowIndividual(self, index)
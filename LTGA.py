@@ -2,11 +2,12 @@
 This module contains the implementation of LTGA itself.  It includes
 functionality for each of the variants
 '''
-import math
 import random
+import bisect
 from itertools import combinations
 import Util
-from Individual import Individual
+import Linkage
+from Individual import Individual, Genome
 
 
 class LTGA(object):
@@ -38,43 +39,19 @@ class LTGA(object):
         - ``value``: The list of values to change to.
         '''
         for valueIndex, geneIndex in enumerate(mask):
-            individual.genes[geneIndex] = value[valueIndex]
-
-    def entropy(self, mask, lookup):
-        '''
-        Calculates the current populations entropy for a given mask.
-
-        Parameters:
-
-        - ``mask``: The list of indices to examine
-        - ``lookup``: A dictionary containing entropy values already found for
-          this population.  Should be reset if the population changes.
-        '''
-        try:
-            return lookup[mask]
-        except KeyError:
-            occurances = {}
-            for individual in self.individuals:
-                # extract the gene values for the cluster
-                value = self.getMaskValue(individual, mask)
-                try:
-                    occurances[value] += 1
-                except KeyError:
-                    occurances[value] = 1
-            total = float(len(self.individuals))
-            result = -sum(x / total * math.log(x / total, 2)
-                          for x in occurances.itervalues())
-            lookup[mask] = result
-            return result
+            individual.setGene(geneIndex, value[valueIndex])
 
     def clusterDistance(self, c1, c2, lookup):
         '''
         Calculates the true entropic distance between two clusters of genes.
+        Reads cluster entropies from ``self.entropies``, which ``buildTree``
+        sets for the current population, so clusters are given by their
+        number in ``self.entropies``.
 
         Parameters:
 
-        - ``c1``: The first cluster.
-        - ``c2``: The second cluster.
+        - ``c1``: The number of the first cluster.
+        - ``c2``: The number of the second cluster.
         - ``lookup``: A dictionary mapping cluster pairs to their previously
           found distances.  Should be reset if the population changes.
         '''
@@ -82,9 +59,9 @@ class LTGA(object):
             return lookup[c1, c2]
         except KeyError:
             try:
-                result = 2 - ((self.entropy(c1, lookup) +
-                               self.entropy(c2, lookup))
-                              / self.entropy(c1 + c2, lookup))
+                result = 2 - ((self.entropies.entropy(c1) +
+                               self.entropies.entropy(c2))
+                              / self.entropies.joint(c1, c2))
             except ZeroDivisionError:
                 result = 2  # Zero division only happens in 0/0
             lookup[c1, c2] = result
@@ -94,7 +71,9 @@ class LTGA(object):
     def pairwiseDistance(self, c1, c2, lookup):
         '''
         Calculates the pairwise approximation of the entropic distance between
-        two clusters of genes.
+        two clusters of genes.  Reads gene to gene distances from
+        ``self.distances``, which ``buildTree`` sets for the current
+        population.
 
         Parameters:
 
@@ -107,7 +86,7 @@ class LTGA(object):
             return lookup[c1, c2]
         except KeyError:
             # averages the pairwise distance between each cluster
-            result = sum(self.clusterDistance((a,), (b,), lookup)
+            result = sum(float(self.distances[a, b])
                          for a in c1 for b in c2) / float(len(c1) * len(c2))
             lookup[c1, c2] = result
             lookup[c2, c1] = result
@@ -116,11 +95,17 @@ class LTGA(object):
     def buildTree(self, distance):
         '''
         Given a method of calculating distance, build the linkage tree for the
-        current population.  The tree is built by finding the two clusters with
-        the minimum distance and merging them into a single cluster.  The
-        process is initialized with all possible clusters of size 1 and ends
-        when only a single cluster remains.  Returns the subtrees in the order
-        they were created.
+        current population, as counted by ``self.statistics``, which is
+        counted again if a crossover replaced the population.  The tree is
+        built by finding the two clusters with the minimum distance and
+        merging them into a single cluster.  The process is initialized with
+        all possible clusters of size 1 and ends when only a single cluster
+        remains.  Returns the subtrees in the order they were created.  As
+        ``self.pairwiseDistance`` is equivalent to average linkage, it is
+        built using ``Linkage.averageLinkage``, which breaks ties the same
+        way but keeps the sums of gene distances between clusters.  The
+        entropy of merged clusters used by ``self.clusterDistance`` is
+        tracked using ``Linkage.ClusterEntropy``.
 
         Parameters:
 
@@ -132,6 +117,22 @@ class LTGA(object):
         random.shuffle(clusters)
         random.shuffle(subtrees)
         lookup = {}
+        if self.statistics is None:
+            # Counts the whole population in one pass
+            matrix = Linkage.populationMatrix(self.individuals)
+            self.statistics = Linkage.LinkageStatistics(matrix)
+        if distance == self.pairwiseDistance:
+            # Gene to gene distances come from the maintained pair counts
+            self.distances = self.statistics.distances()
+            # Pairwise distance is average linkage, which can be clustered
+            # without calling this method for every pair after each merge
+            order = [cluster[0] for cluster in clusters]
+            return subtrees + Linkage.averageLinkage(self.distances, order)
+        # Cluster entropies are found from histograms of the merged clusters
+        matrix = Linkage.populationMatrix(self.individuals)
+        self.entropies = Linkage.ClusterEntropy(matrix)
+        # Clusters are compared by number, in the same order as the genes
+        clusters = [cluster[0] for cluster in clusters]
 
         def allLowest():
             '''
@@ -153,11 +154,11 @@ class LTGA(object):
             c1, c2 = random.choice(allLowest())
             clusters.remove(c1)
             clusters.remove(c2)
-            combined = c1 + c2
+            combined = self.entropies.merge(c1, c2)
             clusters.append(combined)
             # Only add it as a subtree if it is not the root
             if len(clusters) != 1:
-                subtrees.append(combined)
+                subtrees.append(self.entropies.members[combined])
         return subtrees
 
     def leastLinkedFirst(self, subtrees):
@@ -187,7 +188,37 @@ class LTGA(object):
         '''
         return sorted(subtrees, key=len)
 
-    def applyMask(self, p1, p2, mask):
+    def changedIndices(self, mask, before, after):
+        '''
+        Returns the list of indices in the mask at which two sets of mask
+        values differ.  Used to report which genes changed when delta
+        evaluation is enabled.
+
+        Parameters:
+
+        - ``mask``: The list of indices the values are for.
+        - ``before``: The original values for the mask.
+        - ``after``: The new values for the mask.
+        '''
+        return [g for g, old, new in zip(mask, before, after) if old != new]
+
+    def maskBits(self, mask):
+        '''
+        Converts a crossover mask into an integer that has the bit associated
+        with each gene in the mask set, using the same bit order as
+        ``Individual.__int__``.
+
+        Parameters:
+
+        - ``mask``: The list of indices in this crossover.
+        '''
+        length = len(self.individuals[0].genes)
+        bits = 0
+        for g in mask:
+            bits |= 1 << (length - 1 - g)
+        return bits
+
+    def applyMask(self, p1, p2, bits):
         '''
         Used by two parent crossover to create an individual by coping the
         genetic information from p2 into a clone of p1 for all genes in the
@@ -197,11 +228,12 @@ class LTGA(object):
 
         - ``p1``: The first parent.
         - ``p2``: The second parent.
-        - ``mask``: The list of indices used in this crossover.
+        - ``bits``: The crossover mask converted using ``maskBits``.
         '''
-        maskSet = set(mask)
-        return Individual([p2.genes[g] if g in maskSet else p1.genes[g]
-                           for g in range(len(p1.genes))])
+        child = Individual()
+        child.genes = Genome.fromKey((int(p1) & ~bits) | (int(p2) & bits),
+                                     len(p1.genes))
+        return child
 
     def twoParentCrossover(self, masks):
         '''
@@ -215,29 +247,215 @@ class LTGA(object):
         - ``masks``: The list of crossover masks to be used when generating
           individuals, ordered based on how they should be applied.
         '''
-        offspring = []
+        # Creates an empty population of the same type, such as a list
+        offspring = type(self.individuals)()
+        self.skippedMasks.append(0)
+        # Shuffles positions instead of individuals, as populations stored
+        # in a matrix copy individuals when they are assigned
+        order = range(len(self.individuals))
+        # Converts each mask once for use in every crossover
+        bitmasks = [self.maskBits(mask) for mask in masks]
         # Does the following twice in order to make enough children
         for _ in [0, 1]:
-            random.shuffle(self.individuals)
+            random.shuffle(order)
             # pairs off parents with their neighbor
-            for i in xrange(0, len(self.individuals) - 1, 2):
+            for i, j in zip(order[:-1:2], order[1::2]):
                 p1 = self.individuals[i]
-                p2 = self.individuals[i + 1]
-                for mask in masks:
-                    c1 = self.applyMask(p1, p2, mask)
-                    c2 = self.applyMask(p2, p1, mask)
-                    # Duplicates are caught higher up
-                    c1.fitness = yield c1
-                    c2.fitness = yield c2
+                p2 = self.individuals[j]
+                for mask, bits in zip(masks, bitmasks):
+                    # Parents that agree on the whole mask recreate themselves
+                    if (int(p1) ^ int(p2)) & bits == 0:
+                        self.skippedMasks[-1] += 1
+                        continue
+                    c1 = self.applyMask(p1, p2, bits)
+                    c2 = self.applyMask(p2, p1, bits)
+                    # Other duplicates are caught higher up
+                    if self.delta:
+                        changed = self.changedIndices(
+                            mask, self.getMaskValue(p1, mask),
+                            self.getMaskValue(p2, mask))
+                        c1.fitness = yield c1, changed, p1.fitness
+                        c2.fitness = yield c2, changed, p2.fitness
+                    else:
+                        c1.fitness = yield c1
+                        c2.fitness = yield c2
                     # if the best child is better than the best parent
                     if max(p1, p2) < max(c1, c2):
                         p1, p2 = c1, c2
                 # Overwrite the parents with the modified version
                 self.individuals[i] = p1
-                self.individuals[i + 1] = p2
+                self.individuals[j] = p2
+                # The offspring is the best individual created during the cross
+                offspring.append(max(p1, p2))
+        self.individuals = offspring
+        # Every individual was replaced, so the next tree counts them again
+        self.statistics = None
+
+    def batchedTwoParentCrossover(self, masks):
+        '''
+        Creates individual generator using the two parent crossover variant.
+        Each pair of parents is crossed identically to ``twoParentCrossover``,
+        but all pairs are crossed on a mask before any pair moves on to the
+        next mask.  As pairs are independent, the children of every pair for
+        a mask are sent out together as a single list, and a list of their
+        fitness values is expected back.  Terminates when a complete
+        evolutionary generation has finished.
+
+        Parameters:
+
+        - ``masks``: The list of crossover masks to be used when generating
+          individuals, ordered based on how they should be applied.
+        '''
+        # Creates an empty population of the same type, such as a list
+        offspring = type(self.individuals)()
+        self.skippedMasks.append(0)
+        order = range(len(self.individuals))
+        # Converts each mask once for use in every crossover
+        bitmasks = [self.maskBits(mask) for mask in masks]
+        # Does the following twice in order to make enough children
+        for _ in [0, 1]:
+            random.shuffle(order)
+            # pairs off parents with their neighbor
+            pairs = zip(order[:-1:2], order[1::2])
+            parents = [[self.individuals[i], self.individuals[j]]
+                       for i, j in pairs]
+            for bits in bitmasks:
+                crossed, children = [], []
+                for pair in parents:
+                    p1, p2 = pair
+                    # Parents that agree on the whole mask recreate themselves
+                    if (int(p1) ^ int(p2)) & bits == 0:
+                        self.skippedMasks[-1] += 1
+                        continue
+                    crossed.append(pair)
+                    children.append(self.applyMask(p1, p2, bits))
+                    children.append(self.applyMask(p2, p1, bits))
+                if not children:
+                    continue
+                # Duplicates are caught higher up
+                fitnesses = yield children
+                for child, fitness in zip(children, fitnesses):
+                    child.fitness = fitness
+                for k, pair in enumerate(crossed):
+                    c1, c2 = children[2 * k], children[2 * k + 1]
+                    # if the best child is better than the best parent
+                    if max(pair) < max(c1, c2):
+                        pair[:] = [c1, c2]
+            for (i, j), (p1, p2) in zip(pairs, parents):
+                # Overwrite the parents with the modified version
+                self.individuals[i] = p1
+                self.individuals[j] = p2
+                # The offspring is the best individual created during the cross
+                offspring.append(max(p1, p2))
+        self.individuals = offspring
+        # Every individual was replaced, so the next tree counts them again
+        self.statistics = None
+
+    def inPlaceTwoParentCrossover(self, masks):
+        '''
+        Creates individual generator using the two parent crossover variant,
+        with identical search behavior to ``twoParentCrossover``.  Instead of
+        creating two children for every mask, the mask's genes are swapped
+        between the parents in place and swapped back after evaluation.  New
+        individuals are only created when the children are kept.
+
+        Parameters:
+
+        - ``masks``: The list of crossover masks to be used when generating
+          individuals, ordered based on how they should be applied.
+        '''
+        # Creates an empty population of the same type, such as a list
+        offspring = type(self.individuals)()
+        self.skippedMasks.append(0)
+        order = range(len(self.individuals))
+        # Does the following twice in order to make enough children
+        for _ in [0, 1]:
+            random.shuffle(order)
+            # pairs off parents with their neighbor
+            for i, j in zip(order[:-1:2], order[1::2]):
+                p1 = self.individuals[i]
+                p2 = self.individuals[j]
+                for mask in masks:
+                    v1 = self.getMaskValue(p1, mask)
+                    v2 = self.getMaskValue(p2, mask)
+                    # Parents that agree on the whole mask recreate themselves
+                    if v1 == v2:
+                        self.skippedMasks[-1] += 1
+                        continue
+                    # Turn the parents into the children
+                    self.setMaskValues(p1, mask, v2)
+                    self.setMaskValues(p2, mask, v1)
+                    # Other duplicates are caught higher up
+                    if self.delta:
+                        changed = self.changedIndices(mask, v1, v2)
+                        f1 = yield p1, changed, p1.fitness
+                        f2 = yield p2, changed, p2.fitness
+                    else:
+                        f1 = yield p1
+                        f2 = yield p2
+                    # if the best child is better than the best parent
+                    improved = max(p1.fitness, p2.fitness) < max(f1, f2)
+                    if improved:
+                        c1 = Individual(p1.genes, f1)
+                        c2 = Individual(p2.genes, f2)
+                    # Parents may also be offspring, so they are restored
+                    self.setMaskValues(p1, mask, v1)
+                    self.setMaskValues(p2, mask, v2)
+                    if improved:
+                        p1, p2 = c1, c2
+                # Overwrite the parents with the modified version
+                self.individuals[i] = p1
+                self.individuals[j] = p2
                 # The offspring is the best individual created during the cross
                 offspring.append(max(p1, p2))
         self.individuals = offspring
+        # Every individual was replaced, so the next tree counts them again
+        self.statistics = None
+
+    def donorIndex(self, values):
+        '''
+        Used by global crossover to index the population's values for a mask.
+        Returns a dictionary mapping each distinct value to a list with one
+        entry per occurrence, where entry ``k`` is the position of the
+        ``k``-th occurrence in ``values`` minus ``k``.  These lists are sorted,
+        allowing ``chooseDonor`` to skip over all occurrences of a value using
+        bisection.
+
+        Parameters:
+
+        - ``values``: The list of each individual's values for the mask.
+        '''
+        index = {}
+        for position, value in enumerate(values):
+            try:
+                occurrences = index[value]
+            except KeyError:
+                occurrences = index[value] = []
+            occurrences.append(position - len(occurrences))
+        return index
+
+    def chooseDonor(self, values, index, excluded):
+        '''
+        Used by global crossover to randomly choose a value for a mask from
+        the population that differs from the given value.  Equivalent to
+        ``random.choice`` on the list of ``values`` with all copies of the
+        excluded value removed, including how the random number generator is
+        used, but takes O(log N) time.  Returns None if no value differs.
+
+        Parameters:
+
+        - ``values``: The list of each individual's values for the mask.
+        - ``index``: The result of calling ``donorIndex`` on ``values``.
+        - ``excluded``: The value which cannot be chosen.
+        '''
+        skipped = index.get(excluded, [])
+        options = len(values) - len(skipped)
+        if options == 0:
+            return None
+        choice = int(random.random() * options)
+        # The number of excluded values that appear before the choice
+        before = bisect.bisect_right(skipped, choice)
+        return values[choice + before]
 
     def globalCrossover(self, masks):
         '''
@@ -257,21 +475,29 @@ class LTGA(object):
             for individual in self.individuals:
                 value = self.getMaskValue(individual, mask)
                 values[mask].append(value)
+        indices = {mask: self.donorIndex(values[mask]) for mask in masks}
         # each individual creates a single offspring, which replaces itself
         for individual in self.individuals:
             for mask in masks:
                 startingValue = self.getMaskValue(individual, mask)
-                # Find the list of values in the population that differ from
+                # Choose from the values in the population that differ from
                 # the current individual's values for this mask
-                options = [value for value in values[mask]
-                           if value != startingValue]
-                if len(options) > 0:
-                    value = random.choice(options)
+                value = self.chooseDonor(values[mask], indices[mask],
+                                         startingValue)
+                if value is not None:
                     self.setMaskValues(individual, mask, value)
-                    newFitness = yield individual
+                    if self.delta:
+                        changed = self.changedIndices(mask, startingValue,
+                                                      value)
+                        newFitness = yield (individual, changed,
+                                            individual.fitness)
+                    else:
+                        newFitness = yield individual
                     # if the individual improved, update fitness
                     if individual.fitness < newFitness:
                         individual.fitness = newFitness
+                        self.statistics.change(individual.genes, mask,
+                                               startingValue)
                     # The individual did not improve, revert changes
                     else:
                         self.setMaskValues(individual, mask, startingValue)
@@ -282,15 +508,17 @@ class LTGA(object):
         individuals that need to be evaluated and receives fitness information.
         Will continue sending out individuals until the population contains
         only one unique individual or a generation passes without the set of
-        unique individuals changing.
+        unique individuals changing.  Two parent crossovers skip masks on
+        which both parents agree, recording how many were skipped in each
+        generation to ``self.skippedMasks``.
 
         Parameters:
 
         - ``initialPopulation``: The list of individuals to be used as the
-          basis for LTGA's evolution.  These individuals should already have
-          fitness values set.  If local search is to be performed on the
-          initial population, it should be done before sending to this
-          function.
+          basis for LTGA's evolution, or an ``Individual.PopulationMatrix``.
+          These individuals should already have fitness values set.  If local
+          search is to be performed on the initial population, it should be
+          done before sending to this function.
         - ``config``: A dictionary containing all configuration information
           required by LTGA to generate individuals.  Should include values
           for:
@@ -302,24 +530,54 @@ class LTGA(object):
             should be used as crossover masks, for instance
             ``leastLinkedFirst`` and ``smallestFirst``.
           - ``crossover``: The method used to generate new individuals, for
-            instance ``twoParentCrossover`` and ``globalCrossover``.
+            instance ``twoParentCrossover``, ``inPlaceTwoParentCrossover``,
+            ``batchedTwoParentCrossover`` and ``globalCrossover``.
+          - ``batch``: Optional, if true lists of individuals that can be
+            evaluated independently are sent out, and a list of their
+            fitness values is expected back.  Otherwise individuals are sent
+            out one at a time.
+          - ``delta``: Optional, if true and not batching, crossovers that
+            change an existing individual send out a tuple of the new
+            individual, the list of indices at which it differs from the
+            original, and the original's fitness.
         '''
         self.individuals = initialPopulation
+        # Number of crossovers skipped in each generation
+        self.skippedMasks = []
+        # Linkage counts are made by the first tree, and global crossover
+        # keeps them current as the population changes
+        self.statistics = None
         distance = Util.classMethods(self)[config["distance"]]
         ordering = Util.classMethods(self)[config["ordering"]]
         crossover = Util.classMethods(self)[config["crossover"]]
+        batch = config.get("batch", False)
+        self.delta = config.get("delta", False) and not batch
         beforeGenerationSet = set(self.individuals)
         while True:
             subtrees = self.buildTree(distance)
             masks = ordering(subtrees)
             generator = crossover(masks)
-            individual = generator.next()
+            fitness = None
             while True:
-                fitness = yield individual
                 try:
-                    individual = generator.send(fitness)
+                    # Two parent crossovers send nothing in a generation in
+                    # which every mask is skipped, so this is not the end
+                    candidates = generator.send(fitness)
                 except StopIteration:
                     break
+                # Converts between what the crossover sends out and the
+                # protocol requested by the configuration
+                if not isinstance(candidates, list):
+                    if batch:
+                        fitness = (yield [candidates])[0]
+                    else:
+                        fitness = yield candidates
+                elif batch:
+                    fitness = yield candidates
+                else:
+                    fitness = []
+                    for individual in candidates:
+                        fitness.append((yield individual))
             # If all individuals are identical
             currentSet = set(self.individuals)
             if (len(currentSet) == 1 or
@@ -0,0 +1,320 @@
+'''
+This module contains the population statistics used by LTGA to determine
+gene linkage.  All statistics are gathered using NumPy over a population
+matrix, where each row is an individual's genes.
+'''
+import math
+import random
+from itertools import izip
+import numpy
+from Individual import PopulationMatrix
+
+
+def populationMatrix(individuals):
+    '''
+    Converts a list of individuals into a two dimensional array such that
+    row ``i`` contains the genes of ``individuals[i]``.  If the individuals
+    are already stored in a ``PopulationMatrix`` its array is used directly.
+
+    Parameters:
+
+    - ``individuals``: The list of individuals to convert.
+    '''
+    if isinstance(individuals, PopulationMatrix):
+        return individuals.matrix()
+    return numpy.array([individual.genes for individual in individuals],
+                       dtype=numpy.uint8)
+
+
+def entropy(counts, total):
+    '''
+    Calculates the entropy of each distribution of counts, where the last axis
+    of ``counts`` contains how often each value occurred.  Counts of zero
+    contribute nothing to the entropy.  Terms are rounded the same way as
+    ``math.log(x, 2)`` and added one at a time in the order of the last axis,
+    so results are identical to summing over a dictionary of occurrences that
+    iterates in this order.
+
+    Parameters:
+
+    - ``counts``: Array of value occurrences, last axis is summed over.
+    - ``total``: The number of samples each distribution was built from.
+    '''
+    p = counts / float(total)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        terms = numpy.where(p > 0, p * (numpy.log(p) / numpy.log(2.0)), 0.0)
+    # Unlike sum, cumulative sums always add in order
+    return -terms.cumsum(axis=-1)[..., -1]
+
+
+class LinkageStatistics(object):
+    '''
+    Stores the single gene and pairwise joint value counts of a binary
+    population, which is everything required to find the pairwise entropic
+    distance between all genes.
+    '''
+    def __init__(self, matrix):
+        '''
+        Counts all single gene and pairwise gene values in the population in
+        a single pass.
+
+        Parameters:
+
+        - ``matrix``: The population matrix, as created by
+          ``populationMatrix``.
+        '''
+        self.size = matrix.shape[0]
+        # ones[i] is how many individuals have gene i set
+        self.ones = matrix.sum(axis=0, dtype=numpy.int64)
+        # both[i, j] is how many individuals have genes i and j set.  Floating
+        # point products use BLAS, and are exact for fewer than 2^53 rows
+        genes = matrix.astype(numpy.float64)
+        self.both = numpy.dot(genes.T, genes).astype(numpy.int64)
+
+    def change(self, genes, mask, previous):
+        '''
+        Updates the counts after an individual in the population had the genes
+        in a mask changed.  Only the rows and columns of the mask are touched,
+        so the cost is proportional to the mask size times the genome length.
+
+        Parameters:
+
+        - ``genes``: The individual's list of genes after the change.
+        - ``mask``: The list of indices that were changed.
+        - ``previous``: The gene values for the mask before the change.
+        '''
+        mask = list(mask)
+        after = numpy.array(genes, dtype=numpy.int64)
+        before = after.copy()
+        before[mask] = previous
+        self.ones[mask] += after[mask] - before[mask]
+        self.both[mask, :] += (numpy.outer(after[mask], after) -
+                               numpy.outer(before[mask], before))
+        # The pair counts are symmetric, so the columns match the rows
+        self.both[:, mask] = self.both[mask, :].T
+
+    def distances(self):
+        '''
+        Returns the n by n matrix of entropic distances between every pair of
+        genes, such that distances[i, j] is identical to the true entropic
+        distance between the clusters holding only genes i and j.
+        '''
+        ones = self.ones
+        single = entropy(numpy.column_stack((self.size - ones, ones)),
+                         self.size)
+        # Builds the four joint counts from the pairwise counts of ones
+        oneZero = ones[:, numpy.newaxis] - self.both
+        zeroOne = ones[numpy.newaxis, :] - self.both
+        zeroZero = self.size - oneZero - zeroOne - self.both
+        # Joint values are in the order a dictionary of gene value tuples
+        # iterates over them, matching the original entropy calculation
+        joint = entropy(numpy.dstack((zeroOne, oneZero, zeroZero, self.both)),
+                        self.size)
+        separate = single[:, numpy.newaxis] + single[numpy.newaxis, :]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            result = 2 - separate / joint
+        # Zero division only happens in 0/0
+        result[joint == 0] = 2
+        return result
+
+
+def averageLinkage(distances, order):
+    '''
+    Builds the average linkage (UPGMA) hierarchy for the given distance matrix
+    by repeatedly merging the closest pair of clusters.  Returns the list of
+    merged clusters, not including the root, in the order they were created.
+    Ties are broken as when comparing every pair of clusters in Python: the
+    clusters are kept in a list starting as ``order``, each merge removes its
+    pair from the list and appends their union, and the merged pair is chosen
+    with ``random.choice`` from the closest pairs listed in the order
+    ``itertools.combinations`` visits them, with the first listed twice.
+
+    The sums of gene to gene distances between clusters are kept, so the sums
+    for a merged cluster are the sums of its two halves, found in O(n) time.
+    The distance from each cluster to its closest other cluster is also kept,
+    and only recalculated when that other cluster is merged, which takes
+    O(n^2) time and memory for typical trees.  Trees where the nearest
+    cluster of most clusters is merged every time, such as one cluster
+    absorbing every gene in turn, still take O(n^3) time.  A nearest
+    neighbor chain would always take O(n^2) time, but merges pairs in a
+    different order and cannot choose between tied pairs in the same way.
+    As the sums are added in a different order than summing one gene pair at
+    a time, distances between merged clusters may differ in the last bit
+    from earlier versions.
+
+    Parameters:
+
+    - ``distances``: The symmetric n by n matrix of distances between single
+      genes.  This matrix is not modified.
+    - ``order``: The gene indices in the order they should start in the list
+      of clusters, allowing the caller to randomize construction.
+    '''
+    genes = len(order)
+    # Cluster i < genes is gene i and merged clusters are numbered after them
+    totals = numpy.zeros((2 * genes, 2 * genes))
+    totals[:genes, :genes] = distances
+    sizes = numpy.zeros(2 * genes)
+    sizes[:genes] = 1
+    # matrix[a, b] is the distance between the clusters numbered a and b, which
+    # is infinite unless both are different clusters in the list
+    matrix = numpy.full((2 * genes, 2 * genes), numpy.inf)
+    matrix[:genes, :genes] = distances
+    numpy.fill_diagonal(matrix, numpy.inf)
+    nearest = matrix.min(axis=1)
+    members = [(i,) for i in xrange(genes)]
+    clusters = list(order)
+    merges = []
+    while len(clusters) > 1:
+        lowest = nearest.min()
+        position = {cluster: i for i, cluster in enumerate(clusters)}
+        closest = set()
+        for a in numpy.flatnonzero(nearest == lowest).tolist():
+            for b in numpy.flatnonzero(matrix[a] == lowest).tolist():
+                closest.add((min(position[a], position[b]),
+                             max(position[a], position[b])))
+        # Each pair once, in the order combinations of the list visits them
+        closest = sorted(closest)
+        # Searching for the minimum finds its first occurrence twice
+        i, j = random.choice(closest[:1] + closest)
+        a, b = clusters[i], clusters[j]
+        del clusters[j]
+        del clusters[i]
+        merged = len(members)
+        members.append(members[a] + members[b])
+        others = numpy.array(clusters, dtype=int)
+        # Clusters whose nearest cluster was one of the pair must search again
+        stale = others[(matrix[others, a] == nearest[others]) |
+                       (matrix[others, b] == nearest[others])]
+        matrix[[a, b], :] = numpy.inf
+        matrix[:, [a, b]] = numpy.inf
+        nearest[[a, b]] = numpy.inf
+        sizes[merged] = sizes[a] + sizes[b]
+        totals[merged] = totals[:, merged] = totals[a] + totals[b]
+        row = totals[merged, others] / (sizes[merged] * sizes[others])
+        matrix[merged, others] = matrix[others, merged] = row
+        nearest[others] = numpy.minimum(nearest[others], row)
+        nearest[stale] = matrix[stale].min(axis=1)
+        if len(others):
+            nearest[merged] = row.min()
+        clusters.append(merged)
+        # Only add it as a subtree if it is not the root
+        if len(clusters) != 1:
+            merges.append(members[merged])
+    return merges
+
+
+class ClusterEntropy(object):
+    '''
+    Finds the entropy of clusters of genes without rereading the genes of the
+    population.  Clusters are referred to by number, where cluster ``i`` is
+    gene ``i`` for every gene and merged clusters are numbered in the order
+    they are created, so clusters of any size are compared and stored using
+    only integers.  Each active cluster stores a compact integer code per
+    individual, such that two individuals have the same code only if they
+    have the same values for every gene in the cluster.  The codes for the
+    union of two clusters are a combination of their codes.  Entropies are
+    added up in the same order as counting each individual's values for the
+    cluster in a dictionary, so they are identical to doing so.
+    '''
+    def __init__(self, matrix):
+        '''
+        Creates a cluster for each gene, whose codes are simply that gene's
+        values in the population.
+
+        Parameters:
+
+        - ``matrix``: The population matrix, as created by
+          ``populationMatrix``.
+        '''
+        self.size = matrix.shape[0]
+        self.matrix = matrix
+        # members[c] is the tuple of gene indices in cluster c
+        self.members = []
+        self.codes = []
+        self.values = []
+        self.entropies = []
+        for i in xrange(matrix.shape[1]):
+            codes = matrix[:, i].astype(numpy.int64)
+            self.members.append((i,))
+            self.codes.append(codes)
+            self.values.append(2)
+            self.entropies.append(self.valueEntropy(codes, (i,)))
+
+    def valueEntropy(self, codes, members):
+        '''
+        Returns the entropy of the values of a set of genes, given the code
+        of each individual's values.  Values are counted using NumPy, but the
+        terms are added in the order a dictionary of value tuples filled in
+        population order iterates over them.
+
+        Parameters:
+
+        - ``codes``: The code of each individual's values for the genes.
+        - ``members``: The gene indices, in the order values are read.
+        '''
+        _, first, counts = numpy.unique(codes, return_index=True,
+                                        return_counts=True)
+        order = numpy.argsort(first)
+        values = self.matrix[numpy.ix_(first[order], members)].tolist()
+        # Filling the dictionary in the same order gives the same layout
+        occurrences = {}
+        for value, count in izip(values, counts[order].tolist()):
+            occurrences[tuple(value)] = count
+        total = float(self.size)
+        return -sum(x / total * math.log(x / total, 2)
+                    for x in occurrences.itervalues())
+
+    def entropy(self, cluster):
+        '''
+        Returns the entropy of a cluster.
+
+        Parameters:
+
+        - ``cluster``: The number of the cluster.
+        '''
+        return self.entropies[cluster]
+
+    def combine(self, c1, c2):
+        '''
+        Returns the codes each individual would have for the union of two
+        active clusters.  Codes are unique but not necessarily compact.
+
+        Parameters:
+
+        - ``c1``: The number of the first cluster.
+        - ``c2``: The number of the second cluster.
+        '''
+        return self.codes[c1] * self.values[c2] + self.codes[c2]
+
+    def joint(self, c1, c2):
+        '''
+        Returns the entropy of the union of two active clusters.
+
+        Parameters:
+
+        - ``c1``: The number of the first cluster.
+        - ``c2``: The number of the second cluster.
+        '''
+        return self.valueEntropy(self.combine(c1, c2),
+                                 self.members[c1] + self.members[c2])
+
+    def merge(self, c1, c2):
+        '''
+        Creates the union of two active clusters, whose members are those of
+        ``c1`` followed by those of ``c2``.  The original clusters are no
+        longer active, and their codes are discarded.  Returns the number of
+        the new cluster.
+
+        Parameters:
+
+        - ``c1``: The number of the first cluster.
+        - ``c2``: The number of the second cluster.
+        '''
+        uniques, codes = numpy.unique(self.combine(c1, c2),
+                                      return_inverse=True)
+        self.members.append(self.members[c1] + self.members[c2])
+        self.codes.append(codes)
+        self.values.append(len(uniques))
+        self.entropies.append(self.valueEntropy(codes, self.members[-1]))
+        self.codes[c1] = self.codes[c2] = None
+        return len(self.members) - 1
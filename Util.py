@@ -8,6 +8,10 @@ import random
 import math
 import os
 import itertools
+import collections
+import multiprocessing
+import signal
+import sys
 
 
 def classMethods(classType):
@@ -171,3 +175,109 @@ def binaryCounter(bits):
     - ``bits`` The number of bits in the binary counter.
     '''
     return itertools.product((0, 1), repeat=bits)
+
+
+def createPool(processes):
+    '''
+    Creates and returns a ``multiprocessing.Pool`` of the given number of
+    processes.  Workers ignore keyboard interrupts, leaving them to the
+    process which created the pool.
+
+    Parameters:
+
+    - ``processes``: The number of worker processes.
+    '''
+    return multiprocessing.Pool(processes, signal.signal,
+                                (signal.SIGINT, signal.SIG_IGN))
+
+
+def poolMap(function, tasks, processes, ordered=True):
+    '''
+    Creates a generator which calls the function on each task and yields the
+    results.  Uses a pool of processes given by ``createPool`` if more than
+    one process is requested, and otherwise calls the function in this
+    process.  Waiting for a result can be stopped by a keyboard interrupt,
+    and the pool is terminated once the generator finishes or is closed.
+
+    Parameters:
+
+    - ``function``: The function to call, which takes a single task.  Must be
+      defined at the top level of a module so it can be pickled.
+    - ``tasks``: The list of tasks.
+    - ``processes``: The number of processes to use.
+    - ``ordered``: Optional, if true results are yielded in the same order as
+      the tasks, otherwise as soon as they are finished.  Defaults to true.
+    '''
+    if processes <= 1:
+        for task in tasks:
+            yield function(task)
+        return
+    pool = createPool(processes)
+    try:
+        if ordered:
+            results = pool.imap(function, tasks)
+        else:
+            results = pool.imap_unordered(function, tasks)
+        for _ in tasks:
+            # A timeout allows keyboard interrupts to be received
+            yield results.next(sys.maxint)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+class LRUCache(object):
+    '''
+    A dictionary-like container which holds at most a fixed number of items.
+    When full, adding an item discards the least recently used item.
+    '''
+    def __init__(self, capacity):
+        '''
+        Creates an empty cache.
+
+        Parameters:
+
+        - ``capacity``: The most items the cache can hold.
+        '''
+        self.capacity = capacity
+        self.items = collections.OrderedDict()
+
+    def __getitem__(self, key):
+        '''
+        Returns the item stored for the key, marking it as most recently used.
+        Raises a KeyError if the key is not stored.
+
+        Parameters:
+
+        - ``key``: The key of the item to return.
+        '''
+        value = self.items.pop(key)
+        self.items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        '''
+        Stores an item as the most recently used, discarding the least
+        recently used item if the cache is over capacity.
+
+        Parameters:
+
+        - ``key``: The key of the item to store.
+        - ``value``: The item to store.
+        '''
+        self.items.pop(key, None)
+        self.items[key] = value
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def __len__(self):
+        '''
+        Returns the number of items in the cache.
+        '''
+        return len(self.items)
+
+    def clear(self):
+        '''
+        Discards all items in the cache.
+        '''
+        self.items.clear()
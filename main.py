@@ -3,7 +3,8 @@ This module is intended to duplicate the 'main()' function found in other
 languages such as C++ and Java.  In order to run an experiment, this module
 should be passes to your interpreter.  In the interest of speed and consistency
 we suggest that PyPy 1.8.0 with GCC 4.6.2 be used to run this code, although
-Python 2.7 should be able to handle it correctly.
+Python 2.7 should be able to handle it correctly.  Linkage statistics are
+gathered using NumPy, which must be installed for the chosen interpreter.
 
 To see a full description of this modules command line arguments, run
 ````pypy main.py -h````.
@@ -54,6 +55,11 @@ parser.add_argument('-o', dest='output_results', type=str,
 parser.add_argument('-d', dest='dimensions', type=int,
                     help='Use the specified number of dimensions.')
 
+parser.add_argument('-j', '--jobs', dest='jobs', type=int,
+                    help='Perform runs in parallel using the specified' +
+                    ' number of processes.  Each run is seeded by its run' +
+                    ' number, and initial population rows by their position')
+
 if __name__ == '__main__':
     args = parser.parse_args()
     config = Util.loadConfigurations(args.configs)
@@ -69,6 +75,9 @@ if __name__ == '__main__':
     if args.dimensions != None:
         config['dimensions'] = args.dimensions
 
+    if args.jobs != None:
+        config['jobs'] = args.jobs
+
     if 'popSize' not in config or args.bisection:
         if args.verbose:
             print 'Using bisection to determine minimum population size'
@@ -0,0 +1,78 @@
+'''
+This module creates the NK instances and initial populations used by
+experiments ahead of time, such that later runs of ``main.py`` using the same
+configuration files only read saved files.  This avoids the first run of each
+experiment doing this work, and allows it to be shared between many
+processes.  Files are written atomically and locked while being created, so
+several copies of this module can safely be run at once, for instance one
+per range of runs.
+
+To see a full description of this modules command line arguments, run
+````pypy pregenerate.py -h````.
+
+For example, the following command creates the NK instances and initial
+populations of up to 2000 individuals for the first 100 runs of the general
+experiment setup on the Nearest Neighbor NK problem with 30 dimensions, using
+4 processes.  Initial populations are created the same way as ``main.py``
+does when the ``-j`` option is used with the same seed.
+
+``pypy pregenerate.py experiments/general.cfg
+problems/NearestNeighborNK_30_5.cfg -p 2000 -j 4``
+'''
+import argparse
+import sys
+import random
+import Experiments
+import Util
+
+description = 'Creates NK instances and initial populations for later runs'
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument('configs', metavar='Configuration Files',
+                    type=str, nargs='+',
+                    help='One or more json formatted files containing' +
+                        ' configuration information')
+
+parser.add_argument('-p', dest='popSize', type=int, required=True,
+                    help='Create initial populations of up to this size')
+
+parser.add_argument('-s', dest='start', type=int, default=0,
+                    help='The first run number to create files for.' +
+                    ' Defaults to 0')
+
+parser.add_argument('-e', dest='end', type=int,
+                    help='Create files for run numbers below this value.' +
+                    ' Defaults to the configured number of runs')
+
+parser.add_argument('-v', dest='verbose', action='store_true',
+                    help='Include this flag to increase periodic output')
+
+parser.add_argument('-d', dest='dimensions', type=int,
+                    help='Use the specified number of dimensions.')
+
+parser.add_argument('-j', '--jobs', dest='jobs', type=int,
+                    help='Create files in parallel using the specified' +
+                    ' number of processes')
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    config = Util.loadConfigurations(args.configs)
+    config['verbose'] = args.verbose
+    config['popSize'] = args.popSize
+
+    if 'seed' not in config:
+        config['seed'] = random.randint(0, sys.maxint)
+
+    if args.dimensions != None:
+        config['dimensions'] = args.dimensions
+
+    if args.jobs != None:
+        config['jobs'] = args.jobs
+
+    try:
+        end = args.end if args.end != None else config['runs']
+        runNumbers = range(args.start, end)
+        completed = Experiments.pregenerate(config, runNumbers)
+        print 'Created files for', len(completed), 'of', len(runNumbers),
+        print 'runs'
+    except KeyError as e:
+        print 'You must include a configuration value for', e.args[0]
@@ -0,0 +1,85 @@
+'''
+Tests for ``Experiments``.  Run using ``python -m unittest test_Experiments``.
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import random
+import Experiments
+import FitnessFunction
+import HillClimber
+import Util
+
+
+class CreateInitialPopulationTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.config = {"initialPopFolder": self.folder,
+                       "problem": "DeceptiveTrap", "dimensions": 20, "k": 5,
+                       "popSize": 64, "initialPopProcesses": 1}
+        self.evaluator = FitnessFunction.DeceptiveTrap(self.config, 0)
+        random.seed(0)
+        Experiments.createInitialPopulation(0, self.evaluator, self.config)
+        self.filename = os.path.join(self.folder, "DeceptiveTrap_20_5_0.pop")
+        # Starts from a cold cache, as a later run of an experiment would
+        Experiments.populationCache = Util.LRUCache(32)
+        self.climbs = 0
+        self.gainTableClimb = HillClimber.gainTableClimb
+        self.climbRows = Experiments.climbRows
+
+        def counted(climb):
+            def wrapper(*args, **kwargs):
+                self.climbs += 1
+                return climb(*args, **kwargs)
+            return wrapper
+        HillClimber.gainTableClimb = counted(self.gainTableClimb)
+        Experiments.climbRows = counted(self.climbRows)
+
+    def tearDown(self):
+        HillClimber.gainTableClimb = self.gainTableClimb
+        Experiments.climbRows = self.climbRows
+        shutil.rmtree(self.folder)
+
+    def testIncreasingSizesOnlyRead(self):
+        # Ages the file, so any write would change its modification time
+        os.utime(self.filename, (0, 0))
+        for size in [2, 4, 8, 16, 32, 64]:
+            config = dict(self.config, popSize=size)
+            population, _ = Experiments.createInitialPopulation(
+                0, self.evaluator, config)
+            self.assertEqual(len(population), size)
+        self.assertEqual(self.climbs, 0)
+        self.assertEqual(os.stat(self.filename).st_mtime, 0)
+
+
+class BisectionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.config = {"bisectionFolder": self.folder, "seed": 1,
+                       "problem": "DeceptiveTrap", "dimensions": 20, "k": 5}
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testOutcomeChangingValues(self):
+        filename = Experiments.bisectionCacheFile(self.config)
+        # Seeded runs give the same outcomes for any number of processes
+        seeded = Experiments.bisectionCacheFile(dict(self.config, jobs=1))
+        self.assertEqual(seeded, Experiments.bisectionCacheFile(
+            dict(self.config, jobs=4)))
+        self.assertNotEqual(seeded, filename)
+        self.assertNotEqual(filename, Experiments.bisectionCacheFile(
+            dict(self.config, seed=2)))
+
+    def testSavesAreMerged(self):
+        filename = Experiments.bisectionCacheFile(self.config)
+        Experiments.saveOutcomes(filename, self.config, {2: {0: 1}})
+        Experiments.saveOutcomes(filename, self.config, {2: {1: 0},
+                                                         4: {0: 1}})
+        self.assertEqual(Experiments.loadOutcomes(filename),
+                         {2: {0: 1, 1: 0}, 4: {0: 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
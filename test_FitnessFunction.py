@@ -0,0 +1,45 @@
+'''
+Tests for ``FitnessFunction``.  Run using
+``python -m unittest test_FitnessFunction``.
+'''
+import itertools
+import shutil
+import tempfile
+import unittest
+import FitnessFunction
+
+
+class NearestNeighborNKSolveTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def createProblem(self, n, k, runNumber=0):
+        config = {"dimensions": n, "k": k, "problemSeed": 0,
+                  "nkProblemFolder": self.folder}
+        return FitnessFunction.NearestNeighborNK(config, runNumber)
+
+    def testMatchesEnumeration(self):
+        # Includes n equal to 2k and n not divisible by k
+        for n, k in [(2, 1), (5, 1), (4, 2), (7, 2), (6, 3), (10, 3),
+                     (8, 4), (11, 4)]:
+            for runNumber in range(3):
+                problem = self.createProblem(n, k, runNumber)
+                totals = [problem.total(genes) for genes in
+                          itertools.product([0, 1], repeat=n)]
+                self.assertAlmostEqual(problem.min, min(totals))
+                self.assertAlmostEqual(problem.max, max(totals))
+                self.assertAlmostEqual(problem.total(problem.optimal),
+                                       max(totals))
+
+    def testRejectsUnsolvableSizes(self):
+        for n, k in [(6, 0), (3, 2), (5, 3)]:
+            with self.assertRaises(Exception) as context:
+                self.createProblem(n, k)
+            self.assertIn("NK solver requires", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
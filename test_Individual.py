@@ -0,0 +1,115 @@
+'''
+Tests for ``Individual``.  Run using ``python -m unittest test_Individual``.
+'''
+import copy
+import pickle
+import random
+import unittest
+import numpy
+from Individual import Genome, Individual, PopulationMatrix
+
+
+class GenomeKeyTest(unittest.TestCase):
+    def assertKeyCurrent(self, genome):
+        self.assertEqual(genome.key, genome.scalarize())
+
+    def testSettingGenes(self):
+        genome = Genome([0, 1, 1, 0, 1])
+        genome[0] = 1
+        genome[-1] = 0
+        self.assertKeyCurrent(genome)
+        genome[1:3] = [0, 0]
+        self.assertKeyCurrent(genome)
+
+    def testChangingLengthAndOrder(self):
+        genome = Genome([0, 1, 1, 0, 1])
+        for change in [lambda g: g.append(1), lambda g: g.extend([0, 1]),
+                       lambda g: g.insert(0, 1), lambda g: g.pop(),
+                       lambda g: g.remove(0), lambda g: g.reverse()]:
+            change(genome)
+            self.assertKeyCurrent(genome)
+        del genome[0]
+        self.assertKeyCurrent(genome)
+        genome += Genome([1, 1])
+        self.assertKeyCurrent(genome)
+        genome *= 2
+        self.assertKeyCurrent(genome)
+
+
+class RowIndividualKeyTest(unittest.TestCase):
+    def setUp(self):
+        self.genes = [[random.randint(0, 1) for _ in range(70)]
+                      for _ in range(4)]
+        population = PopulationMatrix(Individual(genes)
+                                      for genes in self.genes)
+        self.rows = [population[i] for i in range(len(self.genes))]
+
+    def testGenesAreReadOnly(self):
+        genes = self.rows[0].genes
+        with self.assertRaises(ValueError):
+            genes ^= 1
+        with self.assertRaises(ValueError):
+            genes[0] = 1
+
+    def testSetGene(self):
+        for _ in range(200):
+            row = random.randrange(len(self.rows))
+            index = random.randrange(-70, 70)
+            value = random.randint(0, 1)
+            self.rows[row].setGene(index, value)
+            self.genes[row][index] = value
+        for row, genes in zip(self.rows, self.genes):
+            self.assertEqual(row.genes.tolist(), genes)
+            self.assertEqual(int(row), int(Genome(genes).key))
+
+    def testAssignGenes(self):
+        genes = numpy.ones(70, dtype=numpy.uint8)
+        self.rows[1].setGene(0, 0)
+        self.rows[1].genes = genes
+        self.assertEqual(int(self.rows[1]), 2 ** 70 - 1)
+        self.rows[1].setGene(3, 0)
+        self.assertEqual(int(self.rows[1]), Genome(self.rows[1].genes).key)
+
+
+class CopyTest(unittest.TestCase):
+    def setUp(self):
+        self.genes = [random.randint(0, 1) for _ in range(70)]
+        self.individual = Individual(self.genes, 12.5)
+        self.row = PopulationMatrix([self.individual])[0]
+
+    def assertCopied(self, original, duplicate):
+        self.assertEqual(list(duplicate.genes), self.genes)
+        self.assertEqual(duplicate.fitness, 12.5)
+        self.assertEqual(int(duplicate), int(original))
+        self.assertEqual(duplicate.genes.key, int(original))
+
+    def assertIndependent(self, original, duplicate):
+        self.assertCopied(original, duplicate)
+        duplicate.setGene(0, 1 - self.genes[0])
+        self.assertEqual(list(original.genes), self.genes)
+        self.assertEqual(duplicate.genes.key, duplicate.genes.scalarize())
+
+    def testPickle(self):
+        for original in [self.individual, self.row]:
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                duplicate = pickle.loads(pickle.dumps(original, protocol))
+                self.assertIndependent(original, duplicate)
+
+    def testCopy(self):
+        # A shallow copy shares the genes of an individual, but a row is
+        # always copied out of its matrix
+        self.assertCopied(self.individual, copy.copy(self.individual))
+        self.assertIndependent(self.row, copy.copy(self.row))
+        for original in [self.individual, self.row]:
+            self.assertIndependent(original, copy.deepcopy(original))
+
+    def testGenome(self):
+        genome = Genome(self.genes)
+        for duplicate in [pickle.loads(pickle.dumps(genome, 2)),
+                          copy.deepcopy(genome)]:
+            self.assertEqual(duplicate, genome)
+            self.assertEqual(duplicate.key, genome.key)
+
+
+if __name__ == '__main__':
+    unittest.main()